@@ -0,0 +1,436 @@
+"""Benchmark dan stress test untuk startbot.py.
+
+Menjalankan supervisor sungguhan di direktori sementara dengan bot tiruan (stub) yang
+melaporkan kesiapannya, lalu membanjiri file yang diawasi dengan event. Hasilnya ditulis
+sebagai JSON agar strategi debounce, backend watcher dan mode restart bisa dibandingkan.
+
+Contoh:
+    python3 bench_startbot.py --tree-files 5000 --events 1000 --rounds 5 --output hasil.json
+    python3 bench_startbot.py --backend polling --strategy overlap --warm-standby
+
+Yang diukur:
+- event -> keputusan restart: dari event pertama/terakhir badai hingga debounce selesai
+- lama stop proses lama dan lama start hingga bot siap (ready_pattern terlihat)
+- event -> bot siap kembali
+- berapa event dan permintaan restart yang digabung oleh debounce/koordinator restart
+- CPU dan RSS proses supervisor (tanpa proses bot)
+
+Hanya untuk Linux (membaca /proc) dan tidak membutuhkan jaringan.
+"""
+import argparse
+import http.server
+import importlib.util
+import json
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Bot tiruan: menunggu startup_delay, menampilkan prompt, lalu menandai dirinya siap
+STUB_BOT = '''import os, signal, sys, time
+
+def on_term(signum, frame):
+    time.sleep(float(os.environ.get("BENCH_STOP_DELAY", "0")))  # Meniru bot yang lambat berhenti
+    os._exit(0)
+
+signal.signal(signal.SIGTERM, on_term)
+time.sleep(float(os.environ.get("BENCH_STARTUP_DELAY", "0")))  # Meniru waktu import modul
+print("Siap?", flush=True)
+sys.stdin.readline()
+print("READY", flush=True)
+while True:
+    time.sleep(3600)
+'''
+
+def run_supervisor(startbot_path, events_path):
+    """Mode internal: menjalankan startbot.py dengan pencatat waktu di fungsi-fungsi pentingnya.
+
+    Setiap catatan ditulis sebagai satu baris JSON ke events_path. Waktu memakai
+    time.monotonic() yang sama untuk semua proses di Linux.
+    """
+    spec = importlib.util.spec_from_file_location("startbot", startbot_path)
+    startbot = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(startbot)
+
+    lock = threading.Lock()
+    events_file = open(events_path, 'a', encoding='utf-8')
+    seen = {"file_events": 0}
+
+    def record(**data):
+        with lock:
+            events_file.write(json.dumps(data) + "\n")
+            events_file.flush()
+
+    original_request_restart = startbot.request_restart
+    original_stop_process = startbot.stop_process
+    original_launch = startbot.launch_bot_process
+    original_handle_change = startbot.FolderWatcher.handle_change
+
+    def request_restart(bot):
+        record(kind="decision", bot=bot.name, time=time.monotonic())
+        return original_request_restart(bot)
+
+    def stop_process(bot, process):
+        started = time.monotonic()
+        result = original_stop_process(bot, process)
+        record(kind="stop", bot=bot.name, time=started, seconds=time.monotonic() - started)
+        return result
+
+    def launch_bot_process(bot):
+        started = time.monotonic()
+        process, ready = original_launch(bot)
+        record(kind="launch", bot=bot.name, time=started, seconds=time.monotonic() - started, ready=ready)
+        return process, ready
+
+    def handle_change(self, path, event, description):
+        seen["file_events"] += 1
+        return original_handle_change(self, path, event, description)
+
+    startbot.request_restart = request_restart
+    startbot.stop_process = stop_process
+    startbot.launch_bot_process = launch_bot_process
+    startbot.FolderWatcher.handle_change = handle_change
+
+    startbot.load_config()
+    startbot.start_all_bots()
+    startbot.start_monitoring()  # Berhenti saat menerima SIGINT
+
+    record(kind="counters", file_events=seen["file_events"], bots={
+        bot.name: {
+            "restarts": bot.restart_count,
+            "debounced_events": bot.debounced_events,
+            "collapsed_restarts": bot.collapsed_restarts,
+        }
+        for bot in startbot.bots.values()
+    })
+    events_file.close()
+
+class FakeTelegramHandler(http.server.BaseHTTPRequestHandler):
+    """Pengganti API Telegram lokal: setiap sendMessage langsung dijawab sukses."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = b'{"ok": true, "result": {}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_telegram():
+    """Menjalankan pengganti API Telegram di port acak; mengembalikan (server, URL)."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeTelegramHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-telegram", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def build_workdir(args, telegram_api_url):
+    """Menyiapkan direktori kerja: bot tiruan, pohon folder yang diawasi dan settings.json.
+
+    Notifikasi dikirim ke telegram_api_url (pengganti lokal) agar tidak ada error token kosong
+    dan tidak ada panggilan jaringan keluar.
+    """
+    workdir = tempfile.mkdtemp(prefix="bench_startbot_")
+    stub_path = os.path.join(workdir, "stub_bot.py")
+    with open(stub_path, 'w', encoding='utf-8') as f:
+        f.write(STUB_BOT)
+
+    # Pohon folder rekursif dengan tree_files file yang tersebar di beberapa tingkat
+    tree_root = os.path.join(workdir, "tree")
+    tree_files = []
+    for index in range(args.tree_files):
+        branch = index % args.tree_fanout
+        leaf = (index // args.tree_fanout) % args.tree_fanout
+        directory = os.path.join(tree_root, f"d{branch}", f"d{leaf}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"f{index}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("0\n")
+        tree_files.append(path)
+
+    watched_files = []
+    for index in range(args.watched_files):
+        path = os.path.join(workdir, f"watched{index}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("0\n")
+        watched_files.append(path)
+
+    settings = {
+        "telegram_bot_token": "bench",
+        "telegram_chat_id": "1",
+        "telegram_api_url": telegram_api_url,
+        "script_type": "python",
+        "python_script_path": stub_path,
+        "files_to_watch": [
+            {"path": path, "debounce": args.debounce, "max_wait": args.max_wait} for path in watched_files
+        ],
+        "monitoring_folder": [tree_root],
+        "debounce_interval": args.debounce,
+        "debounce_max_wait": args.max_wait,
+        "restart_delay": 0,
+        "restart_strategy": args.strategy,
+        "watcher_backend": args.backend,
+        "warm_standby": args.warm_standby,
+        "stop_timeout": args.stop_timeout,
+        "echo_output": False,
+        "output_log_dir": os.path.join(workdir, "logs"),
+        "prompts": [{"pattern": r"Siap\?", "answer": "ya"}],
+        "ready_pattern": "READY",
+        "bots": [{"bot_name": f"bench{index + 1}"} for index in range(args.bots)],
+    }
+    with open(os.path.join(workdir, "settings.json"), 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=2)
+    return workdir, tree_files, watched_files
+
+def read_records(events_path):
+    """Membaca semua catatan JSON yang sudah ditulis supervisor."""
+    try:
+        with open(events_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.endswith("\n")]
+    except FileNotFoundError:
+        return []
+
+def process_usage(pid):
+    """(detik CPU, RSS byte) milik satu proses dari /proc."""
+    with open(f'/proc/{pid}/stat', 'rb') as f:
+        fields = f.read().rsplit(b')', 1)[1].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    rss_bytes = int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+    return cpu_seconds, rss_bytes
+
+class UsageSampler:
+    """Mencatat CPU dan RSS supervisor secara berkala di thread terpisah."""
+
+    def __init__(self, pid, interval):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []  # (waktu, detik CPU, RSS byte)
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="usage-sampler", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                cpu_seconds, rss_bytes = process_usage(self.pid)
+            except (OSError, IndexError):
+                return
+            self.samples.append((time.monotonic(), cpu_seconds, rss_bytes))
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def summary(self, since=None):
+        samples = [sample for sample in self.samples if since is None or sample[0] >= since]
+        if len(samples) < 2:
+            return {}
+        wall = samples[-1][0] - samples[0][0]
+        cpu = samples[-1][1] - samples[0][1]
+        rss = [sample[2] for sample in samples]
+        return {
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(cpu, 3),
+            "cpu_percent": round(100 * cpu / wall, 2) if wall else None,
+            "rss_max_bytes": max(rss),
+            "rss_mean_bytes": int(statistics.mean(rss)),
+        }
+
+def wait_for(condition, timeout, interval=0.05):
+    """Menunggu hingga condition() bernilai benar; mengembalikan hasil terakhirnya."""
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(interval)
+
+def distribution(values):
+    """Ringkasan statistik sederhana untuk daftar angka (detik)."""
+    if not values:
+        return None
+    values = sorted(values)
+
+    def percentile(fraction):
+        return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+    return {
+        "count": len(values),
+        "min": round(values[0], 4),
+        "p50": round(percentile(0.5), 4),
+        "p95": round(percentile(0.95), 4),
+        "max": round(values[-1], 4),
+        "mean": round(statistics.mean(values), 4),
+    }
+
+def generate_storm(args, round_index, tree_files, watched_files):
+    """Menulis args.events perubahan isi ke file acak; mengembalikan (waktu pertama, waktu terakhir)."""
+    targets = tree_files + watched_files
+    pause = 1 / args.storm_rate if args.storm_rate else 0
+    first = None
+    for index in range(args.events):
+        path = random.choice(targets)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"{round_index}-{index}-{random.random()}\n")  # Isi selalu berbeda agar lolos cek digest
+        if first is None:
+            first = time.monotonic()
+        if pause:
+            time.sleep(pause)
+    return first, time.monotonic()
+
+def run_round(args, round_index, events_path, tree_files, watched_files):
+    """Menjalankan satu badai event dan mengukur restart yang dihasilkannya."""
+    seen = len(read_records(events_path))
+    first, last = generate_storm(args, round_index, tree_files, watched_files)
+
+    def round_records():
+        return read_records(events_path)[seen:]
+
+    def ready_after_storm():
+        launches = [record for record in round_records() if record["kind"] == "launch"]
+        return len({record["bot"] for record in launches}) >= args.bots
+
+    completed = bool(wait_for(ready_after_storm, args.round_timeout))
+    # Beri waktu untuk restart susulan yang digabung koordinator
+    time.sleep(args.settle)
+    records = round_records()
+    decisions = [record for record in records if record["kind"] == "decision"]
+    launches = [record for record in records if record["kind"] == "launch"]
+    stops = [record for record in records if record["kind"] == "stop"]
+    first_decision = min((record["time"] for record in decisions), default=None)
+    ready_times = [record["time"] + record["seconds"] for record in launches]
+    return {
+        "round": round_index + 1,
+        "completed": completed,
+        "events": args.events,
+        "storm_seconds": round(last - first, 4),
+        "decisions": len(decisions),
+        "restarts": len(launches),
+        "event_to_decision_from_first": round(first_decision - first, 4) if first_decision else None,
+        "event_to_decision_from_last": round(first_decision - last, 4) if first_decision else None,
+        "event_to_ready_from_last": round(max(ready_times) - last, 4) if ready_times else None,
+        "stop_seconds": [round(record["seconds"], 4) for record in stops],
+        "start_to_ready_seconds": [round(record["seconds"], 4) for record in launches],
+        "ready": [record["ready"] for record in launches],
+    }
+
+def run_benchmark(args):
+    startbot_path = os.path.abspath(args.startbot)
+    telegram_server, telegram_api_url = start_fake_telegram()
+    workdir, tree_files, watched_files = build_workdir(args, telegram_api_url)
+    events_path = os.path.join(workdir, "bench_events.jsonl")
+    print(f"Direktori kerja: {workdir} ({len(tree_files)} file pohon, {len(watched_files)} file files_to_watch)")
+
+    env = {
+        **os.environ,
+        "BENCH_STARTUP_DELAY": str(args.stub_startup_delay),
+        "BENCH_STOP_DELAY": str(args.stub_stop_delay),
+    }
+    with open(os.path.join(workdir, "supervisor.out"), 'w', encoding='utf-8') as output:
+        supervisor = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--supervisor", startbot_path, events_path],
+            cwd=workdir, env=env, stdout=output, stderr=subprocess.STDOUT,
+        )
+    sampler = UsageSampler(supervisor.pid, args.sample_interval)
+    try:
+        started = time.monotonic()
+        initial = wait_for(
+            lambda: len([record for record in read_records(events_path) if record["kind"] == "launch"]) >= args.bots,
+            args.round_timeout,
+        )
+        if not initial:
+            raise SystemExit(f"Supervisor tidak menjalankan bot dalam {args.round_timeout} detik, lihat {workdir}/supervisor.out")
+        startup_seconds = time.monotonic() - started
+        time.sleep(args.settle)
+        idle = sampler.summary(since=time.monotonic() - args.settle)
+
+        storm_started = time.monotonic()
+        rounds = []
+        for round_index in range(args.rounds):
+            result = run_round(args, round_index, events_path, tree_files, watched_files)
+            rounds.append(result)
+            print(
+                f"Ronde {result['round']}: {result['restarts']} restart, keputusan {result['event_to_decision_from_last']} dtk "
+                f"setelah event terakhir, siap {result['event_to_ready_from_last']} dtk"
+            )
+        under_load = sampler.summary(since=storm_started)
+    finally:
+        supervisor.send_signal(signal.SIGINT)
+        try:
+            supervisor.wait(timeout=args.stop_timeout + 30)
+        except subprocess.TimeoutExpired:
+            supervisor.kill()
+            supervisor.wait()
+        sampler.stop()
+        telegram_server.shutdown()
+
+    counters = next((record for record in read_records(events_path) if record["kind"] == "counters"), {})
+    total_events = args.events * args.rounds
+    total_restarts = sum(result["restarts"] for result in rounds)
+    result = {
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("supervisor", "output")},
+        "supervisor_startup_seconds": round(startup_seconds, 4),
+        "rounds": rounds,
+        "summary": {
+            "event_to_decision_from_first": distribution([r["event_to_decision_from_first"] for r in rounds if r["event_to_decision_from_first"] is not None]),
+            "event_to_decision_from_last": distribution([r["event_to_decision_from_last"] for r in rounds if r["event_to_decision_from_last"] is not None]),
+            "event_to_ready_from_last": distribution([r["event_to_ready_from_last"] for r in rounds if r["event_to_ready_from_last"] is not None]),
+            "stop_seconds": distribution([value for r in rounds for value in r["stop_seconds"]]),
+            "start_to_ready_seconds": distribution([value for r in rounds for value in r["start_to_ready_seconds"]]),
+            "events_written": total_events,
+            "events_seen_by_supervisor": counters.get("file_events"),
+            "restarts": total_restarts,
+            "events_per_restart": round(total_events / total_restarts, 2) if total_restarts else None,
+        },
+        "counters": counters.get("bots"),
+        "supervisor_usage": {"idle": idle, "under_load": under_load},
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Hasil ditulis ke {args.output}")
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark latensi restart dan overhead startbot.py.")
+    parser.add_argument("--startbot", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "startbot.py"))
+    parser.add_argument("--output", default="bench_result.json", help="File JSON hasil")
+    parser.add_argument("--bots", type=int, default=1, help="Jumlah bot yang mengawasi file yang sama")
+    parser.add_argument("--tree-files", type=int, default=2000, help="Jumlah file di pohon monitoring_folder")
+    parser.add_argument("--tree-fanout", type=int, default=20, help="Jumlah subfolder per tingkat pohon")
+    parser.add_argument("--watched-files", type=int, default=10, help="Jumlah file di files_to_watch")
+    parser.add_argument("--events", type=int, default=500, help="Jumlah perubahan file per ronde")
+    parser.add_argument("--storm-rate", type=float, default=0, help="Event per detik (0 = secepat mungkin)")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--debounce", type=float, default=0.5)
+    parser.add_argument("--max-wait", type=float, default=None)
+    parser.add_argument("--backend", choices=("inotify", "polling"), default="inotify")
+    parser.add_argument("--strategy", choices=("stop_start", "overlap"), default="stop_start")
+    parser.add_argument("--warm-standby", action="store_true")
+    parser.add_argument("--stop-timeout", type=float, default=10)
+    parser.add_argument("--stub-startup-delay", type=float, default=0.2, help="Lama startup bot tiruan (detik)")
+    parser.add_argument("--stub-stop-delay", type=float, default=0, help="Lama bot tiruan berhenti setelah SIGTERM")
+    parser.add_argument("--settle", type=float, default=2, help="Jeda tenang setelah bot siap di setiap ronde")
+    parser.add_argument("--round-timeout", type=float, default=120)
+    parser.add_argument("--sample-interval", type=float, default=0.1, help="Interval sampling CPU/RSS supervisor")
+    parser.add_argument("--keep", action="store_true", help="Jangan hapus direktori kerja")
+    parser.add_argument("--supervisor", nargs=2, metavar=("STARTBOT", "EVENTS"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.supervisor:
+        run_supervisor(*args.supervisor)
+    else:
+        run_benchmark(args)
@@ -1,21 +1,89 @@
 import time
+startup_started = time.perf_counter()  # Titik awal --startup-profile, sebelum import lainnya
 import os
+import sys
+import re
+import codecs
 import subprocess
 import json
 import platform
-import requests
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+import signal
+import importlib
 import logging
+import logging.handlers
 import threading
+import queue
+import hashlib
+import mmap
+import weakref
+import collections
+import gzip
+import shutil
+import html
+import fnmatch
+import socket
+import socketserver
+import argparse
+import random
+import contextlib
+import functools
+try:
+    import resource  # Tidak tersedia di Windows
+except ImportError:
+    resource = None
+
+# requests dan watchdog baru diimpor saat pertama dipakai (lihat lazy_import) agar startup
+# supervisor dan subcommand ctl tetap cepat
+startup_timings = [("import modul", time.perf_counter() - startup_started)]
+startup_profile = False  # Diaktifkan lewat --startup-profile
+
+def lazy_import(name):
+    """Mengimpor modul berat saat pertama dibutuhkan dan mencatat lamanya untuk --startup-profile."""
+    module = sys.modules.get(name)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        startup_timings.append((f"import {name} (tertunda)", time.perf_counter() - started))
+    return module
+
+def mark_startup(label, started):
+    """Mencatat lama satu tahap startup (sejak perf_counter started) untuk --startup-profile."""
+    startup_timings.append((label, time.perf_counter() - started))
+
+def report_startup_profile():
+    """Mencetak rincian waktu startup yang dikumpulkan sejak proses dimulai."""
+    console_logger.info("Profil startup:")
+    for label, seconds in startup_timings:
+        console_logger.info(f"  {label:<40} {seconds * 1000:9.1f} ms")
+    console_logger.info(f"  {'total sejak proses dimulai':<40} {(time.perf_counter() - startup_started) * 1000:9.1f} ms")
+
+def gzip_namer(name):
+    """Nama file hasil rotasi log diberi akhiran .gz."""
+    return name + ".gz"
+
+def gzip_rotator(source, dest):
+    """Mengompres file log yang dirotasi dengan gzip lalu menghapus aslinya."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def compressed_file_handler(path, max_bytes=0, backup_count=5, when=None):
+    """Membuat handler log yang dirotasi berdasarkan ukuran atau waktu dan dikompres gzip."""
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count, encoding='utf-8')
+    else:
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    handler.namer = gzip_namer
+    handler.rotator = gzip_rotator
+    return handler
 
 # Konfigurasi Logging
 log_file_path = os.path.join(os.getcwd(), "log.txt")
 
-# Logging untuk error ke file log.txt
+# Logging untuk error ke file log.txt (dirotasi setiap 5 MB agar tidak tumbuh tanpa batas)
 error_logger = logging.getLogger("error_logger")
 error_logger.setLevel(logging.ERROR)
-file_handler = logging.FileHandler(log_file_path, mode='a')  # Logging ke file log.txt
+file_handler = compressed_file_handler(log_file_path, max_bytes=5 * 1024 * 1024)  # Logging ke file log.txt
 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 error_logger.addHandler(file_handler)
 
@@ -28,10 +96,103 @@ console_logger.addHandler(console_handler)
 
 # Global variables untuk konfigurasi
 config = {}
+config_path = os.path.abspath('settings.json')  # Menggunakan path relatif ke lokasi skrip utama
+config_reload_timer = None
+config_reload_delay = 1  # Jeda sebelum settings.json dibaca ulang agar penulisan file selesai dulu
+
+# Kunci konfigurasi yang perubahannya mengharuskan bot dijalankan ulang
+restart_config_keys = ("script_type", "python_script_path", "node_script_path")
+
+# Observer bersama beserta direktori yang sudah dijadwalkan ((direktori, rekursif) -> ObservedWatch)
+observer = None
+event_handler = None
+observed_watches = {}
+
+# Semua bot yang dijalankan oleh supervisor ini (nama bot -> Bot)
+bots = {}
 
-# Timer global untuk menunda tindakan
-restart_timer = None
-debounce_interval = 15  # Durasi tunggu (detik)
+# Aturan pemantauan yang sudah dikompilasi untuk semua bot (lihat WatchRules)
+watch_rules = None
+
+# Pola yang diabaikan di monitoring_folder jika bot tidak mengatur watch_exclude
+default_watch_exclude = ["*.log", "*.log.*.gz", "*.tmp", "*.swp", "~*", ".git/", "node_modules/", "__pycache__/"]
+
+debounce_interval = 15  # Durasi tunggu default (detik), bisa diatur per bot atau per file
+
+# Cache konfigurasi hasil validasi (lihat read_config); naikkan versi jika formatnya berubah
+config_cache_version = 1
+config_from_cache = False
+watch_pattern_sources = {}  # Daftar pola (digabung "\n") -> sumber regex hasil terjemahan
+
+# Cache isi file yang diawasi (path absolut -> (ukuran, mtime_ns, digest))
+file_digests = {}
+file_digests_lock = threading.Lock()
+mmap_threshold = 1024 * 1024  # File sebesar ini atau lebih di-hash lewat mmap
+
+# Output bot ditulis ke log file dan konsol di thread terpisah dari pembaca pipe
+output_logger_lock = threading.Lock()
+echo_queue = queue.Queue(maxsize=1024)  # Potongan output yang menunggu ditampilkan di konsol
+echo_thread = None
+
+# Batas urutan start yang berjalan bersamaan untuk semua bot (max_concurrent_starts)
+start_slots = None
+start_slots_limit = None
+last_start_time = 0.0  # time.monotonic() saat urutan start terakhir dimulai (untuk start_spacing)
+start_spacing_lock = threading.Lock()
+
+state_lock = threading.Lock()  # Menjaga penulisan state_file (mode reattach)
+
+class Bot:
+    """Status runtime untuk satu definisi bot yang dijalankan oleh supervisor."""
+
+    def __init__(self, name, bot_config):
+        self.name = name
+        self.config = bot_config
+        self.process = None  # Proses bot yang sedang berjalan
+        self.restart_timer = None  # Timer debounce milik bot ini
+        self.lock = threading.Lock()  # Mencegah start/stop bersamaan pada bot yang sama
+        self.stopped_processes = weakref.WeakSet()  # Proses yang sengaja dihentikan supervisor
+        self.group_processes = weakref.WeakSet()  # Proses yang memimpin process group sendiri
+        self.crash_times = collections.deque()  # Waktu crash terakhir untuk deteksi crash loop
+        self.crash_timer = None  # Timer restart otomatis setelah crash
+        self.last_exit_code = None
+        # Koordinator restart: "stopped", "running", "draining" (menghentikan), "starting" (menjalankan)
+        self.state = "stopped"
+        self.state_lock = threading.Lock()
+        self.pending_restart = False  # Permintaan restart yang datang saat restart sedang berjalan
+        self.collapsed_restarts = 0
+        self.debounce_deadline = None  # Batas waktu maksimal menunda restart (max_wait)
+        self.debounce_paths = set()  # Path yang memicu timer debounce yang sedang berjalan
+        self.retired = False  # Bot sudah dihapus dari settings.json
+        self.manual_stop = False  # Bot dihentikan lewat perintah stop; restart otomatis diabaikan
+        self.stdin_lock = threading.Lock()  # Mencegah input dari beberapa sumber tercampur
+        # Statistik untuk endpoint /metrics
+        self.stats = {}  # Sampel terakhir dari /proc (cpu, rss, thread, fd)
+        self.restart_count = 0
+        self.crash_count = 0
+        self.debounced_events = 0  # Event file yang digabung oleh debounce
+        self.event_time = None  # Waktu event file pertama yang memicu restart berikutnya
+        self.event_to_ready_sum = 0.0
+        self.event_to_ready_count = 0
+        # Status untuk kebijakan kesehatan (health)
+        self.started_at = None  # time.monotonic() saat proses aktif diadopsi
+        self.last_output = None  # time.monotonic() saat bot terakhir menulis ke stdout/stderr
+        self.rss_over_count = 0  # Jumlah sampel berturut-turut dengan RSS di atas batas
+        # Output bot: baris terakhir di memori dan logger file yang dirotasi
+        self.output_tail = collections.deque(maxlen=bot_config.get("output_tail_lines", 200))
+        self.output_logger = None
+        self.output_listener = None  # QueueListener yang menulis log output di thread sendiri
+        self.readers = weakref.WeakKeyDictionary()  # Proses -> OutputReader miliknya
+        self.shard_lines = None  # Isi file shard terakhir yang ditulis (khusus worker shard)
+        # Warm standby: proses cadangan yang sudah selesai startup dan menunggu di prompt pertama
+        self.spare = None
+        self.spare_starting = False
+        self.spare_lock = threading.Lock()
+        self.last_change = None  # time.monotonic() saat file yang diawasi terakhir berubah
+        # Restart terjadwal: waktu jatuh tempo berikutnya dan menit cron terakhir yang dipicu
+        self.schedule_due = None
+        self.schedule_minute = None
+        self.schedule_config = None
 
 def resolve_path(path):
     """Konversi path relatif menjadi absolut berdasarkan lokasi skrip yang sedang dijalankan."""
@@ -39,18 +200,323 @@ def resolve_path(path):
         return os.path.abspath(os.path.join(os.path.dirname(__file__), path))
     return path
 
+def build_bot_configs(raw_config):
+    """Membangun daftar konfigurasi per bot dari isi settings.json.
+
+    Jika settings.json memiliki kunci "bots", setiap entri di dalamnya adalah satu bot dan
+    kunci lain di tingkat atas menjadi nilai default untuk semua bot. Tanpa kunci "bots",
+    seluruh file dianggap sebagai satu definisi bot (format lama).
+    """
+    defaults = {key: value for key, value in raw_config.items() if key != "bots"}
+    entries = raw_config.get("bots") or [{}]
+    bot_configs = []
+    for index, entry in enumerate(entries):
+        bot_config = {**defaults, **entry}
+        # Template notifikasi digabung per kunci agar bot cukup menimpa pesan yang berbeda
+        bot_config["notifications"] = {**defaults.get("notifications", {}), **entry.get("notifications", {})}
+        bot_config.setdefault("bot_name", f"bot{index + 1}")
+        # Entri files_to_watch boleh berupa path atau {"path", "debounce", "max_wait"}
+        bot_config.setdefault("debounce_interval", debounce_interval)
+        bot_config.setdefault("debounce_max_wait", None)
+        files_to_watch = []
+        watch_settings = {}
+        for entry_file in bot_config.get("files_to_watch", []):
+            if isinstance(entry_file, dict):
+                # Konversi path relatif menjadi absolut untuk semua file yang diawasi
+                path = resolve_path(entry_file["path"])
+                watch_settings[path] = {
+                    "debounce": entry_file.get("debounce", bot_config["debounce_interval"]),
+                    "max_wait": entry_file.get("max_wait", bot_config["debounce_max_wait"]),
+                }
+            else:
+                path = resolve_path(entry_file)
+            files_to_watch.append(path)
+        bot_config["files_to_watch"] = files_to_watch
+        bot_config["watch_settings"] = watch_settings
+        # monitoring_folder (mode folder rekursif) boleh berupa satu path atau daftar path
+        folders = bot_config.get("monitoring_folder") or []
+        if isinstance(folders, str):
+            folders = [folders]
+        bot_config["monitoring_folder"] = [resolve_path(folder) for folder in folders]
+        bot_config["python_script_path"] = resolve_path(bot_config.get("python_script_path", "bot.py"))
+        bot_config["node_script_path"] = resolve_path(bot_config.get("node_script_path", "bot.js"))
+        bot_config.setdefault("restart_delay", 1)
+        bot_config.setdefault("inputs", [])
+        if bot_config.get("health", {}).get("heartbeat_file"):
+            bot_config["health"] = {**bot_config["health"], "heartbeat_file": resolve_path(bot_config["health"]["heartbeat_file"])}
+        for rule in bot_config.get("prompts", []):
+            # Pola prompt dicek sejak awal agar kesalahan regex tidak baru ketahuan saat bot dijalankan
+            try:
+                re.compile(rule["pattern"])
+            except (KeyError, TypeError, re.error) as e:
+                raise ValueError(f"Pola prompt {rule!r} pada bot {bot_config['bot_name']} tidak valid: {e}")
+        schedule = bot_config.get("schedule")
+        if schedule:
+            try:
+                if "cron" in schedule:
+                    parse_cron(schedule["cron"])
+                elif not schedule["interval"] > 0:
+                    raise ValueError("interval harus lebih dari 0")
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"schedule pada bot {bot_config['bot_name']} tidak valid (isi interval atau cron): {e}")
+        if bot_config.get("shard"):
+            bot_configs.extend(expand_shards(bot_config))
+        else:
+            bot_configs.append(bot_config)
+    return bot_configs
+
+def expand_shards(bot_config):
+    """Memecah satu definisi bot ber-"shard" menjadi satu konfigurasi per worker.
+
+    Setiap worker bernama "<bot>#<n>", membaca file shard miliknya sendiri (lewat env var
+    shard.env_var atau argumen jika shard.pass_as_argument aktif) dan diawasi seperti bot biasa.
+    File data ikut diawasi sehingga perubahan data membuat shard ditulis ulang.
+    """
+    shard = bot_config["shard"]
+    group = bot_config["bot_name"]
+    if "data_file" not in shard:
+        raise ValueError(f"shard.data_file wajib diisi untuk bot {group}.")
+    data_file = resolve_path(shard["data_file"])
+    workers = shard.get("workers") or os.cpu_count() or 1
+    shard_dir = resolve_path(shard.get("shard_dir", "shards"))
+    try:
+        re.compile(shard.get("key_pattern", ""))
+    except re.error as e:
+        raise ValueError(f"shard.key_pattern pada bot {group} tidak valid: {e}")
+    safe_group = re.sub(r'[^\w.-]', '_', group)
+    files_to_watch = bot_config["files_to_watch"]
+    if data_file not in files_to_watch:
+        files_to_watch = [*files_to_watch, data_file]
+    members = []
+    for index in range(workers):
+        members.append({
+            **bot_config,
+            "bot_name": f"{group}#{index + 1}",
+            "files_to_watch": files_to_watch,
+            "shard_group": group,
+            "shard_index": index,
+            "shard_count": workers,
+            "shard_data_file": data_file,
+            "shard_file": os.path.join(shard_dir, f"{safe_group}.{index + 1}.txt"),
+        })
+    return members
+
+def watch_pattern_key(patterns):
+    return "\n".join(patterns)
+
+def compile_watch_patterns(patterns):
+    """Mengompilasi daftar pola glob/regex menjadi satu regex untuk path relatif.
+
+    Sumber regex diambil dari cache konfigurasi jika tersedia (lihat read_config).
+    """
+    if not patterns:
+        return None
+    key = watch_pattern_key(patterns)
+    source = watch_pattern_sources.get(key)
+    if source is None:
+        source = watch_pattern_sources[key] = watch_pattern_source(patterns)
+    return re.compile(source)
+
+def watch_pattern_source(patterns):
+    """Menerjemahkan daftar pola glob/regex menjadi sumber satu regex untuk path relatif.
+
+    Pola berawalan "re:" dipakai sebagai regex apa adanya (dicocokkan dari awal path). Pola glob yang diakhiri "/" berarti
+    direktori dengan nama itu di kedalaman mana pun, glob tanpa "/" dicocokkan dengan nama file
+    di kedalaman mana pun, sedangkan glob dengan "/" dicocokkan dengan path relatif penuh.
+    """
+    parts = []
+    for pattern in patterns:
+        if pattern.startswith("re:"):
+            parts.append(f"(?:{pattern[3:]})")
+        elif pattern.endswith("/"):
+            parts.append(f"(?:(?:.*/)?{fnmatch.translate(pattern + '*')})")
+        elif "/" in pattern:
+            parts.append(f"(?:{fnmatch.translate(pattern)})")
+        else:
+            parts.append(f"(?:(?:.*/)?{fnmatch.translate(pattern)})")
+    return "|".join(parts)
+
+class WatchRules:
+    """Aturan pemantauan gabungan dari semua bot.
+
+    Mendukung dua mode: files_to_watch (file tertentu, dicocokkan lewat dict) dan
+    monitoring_folder (semua file di bawah folder secara rekursif, disaring watch_include dan
+    watch_exclude). Pola dikompilasi sekali saat konfigurasi dimuat, dan pencarian folder hanya
+    menelusuri induk path (sebanyak kedalaman path), bukan seluruh daftar aturan.
+    """
+
+    def __init__(self, bot_list):
+        self.files = {}  # Path file -> daftar bot
+        self.folders = {}  # Path folder -> daftar (bot, include, exclude)
+        self.ignored_dirs = set()  # Direktori milik supervisor (log output, shard) yang selalu diabaikan
+        cache_path = config_cache_path(config_path)
+        self.ignored_files = {log_file_path, cache_path, f"{cache_path}.{os.getpid()}.tmp"}  # File yang ditulis supervisor sendiri
+        if config.get("reattach", False):
+            self.ignored_files.update((state_path(), f"{state_path()}.tmp"))
+        for bot in bot_list:
+            bot_config = bot.config
+            for file_to_watch in bot_config["files_to_watch"]:
+                bots_for_file = self.files.setdefault(file_to_watch, [])
+                if bot not in bots_for_file:
+                    bots_for_file.append(bot)
+            if bot_config["monitoring_folder"]:
+                include = compile_watch_patterns(bot_config.get("watch_include", []))
+                exclude = compile_watch_patterns(bot_config.get("watch_exclude", default_watch_exclude))
+                for folder in bot_config["monitoring_folder"]:
+                    self.folders.setdefault(folder, []).append((bot, include, exclude))
+            self.ignored_dirs.add(resolve_path(bot_config.get("output_log_dir", "logs")))
+            if bot_config.get("shard_group"):
+                self.ignored_dirs.add(os.path.dirname(bot_config["shard_file"]))  # shard_dir ditulis ulang supervisor
+
+    def match(self, path, include_files=True):
+        """Mengembalikan daftar bot yang harus bereaksi terhadap perubahan path."""
+        matched = list(self.files.get(path, [])) if include_files else []
+        if not self.folders or path in self.ignored_files:
+            return matched
+        directory = os.path.dirname(path)
+        while True:
+            if directory in self.ignored_dirs:
+                return matched
+            for bot, include, exclude in self.folders.get(directory, []):
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                if include and not include.match(relative):
+                    continue
+                if exclude and exclude.match(relative):
+                    continue
+                if bot not in matched:
+                    matched.append(bot)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return matched
+            directory = parent
+
+    def skip_directory(self, directory):
+        """True jika tidak ada file di dalam direktori ini yang mungkin cocok dengan aturan.
+
+        Dipakai backend polling agar tidak menelusuri pohon seperti node_modules/ atau .git/.
+        """
+        if any(is_within(directory, ignored) for ignored in self.ignored_dirs):
+            return True
+        if any(is_within(os.path.dirname(file_to_watch), directory) for file_to_watch in self.files):
+            return False
+        covering = [(folder, rules) for folder, rules in self.folders.items() if is_within(directory, folder)]
+        if not covering:
+            return True
+        for folder, rules in covering:
+            relative = os.path.relpath(directory, folder).replace(os.sep, "/")
+            for _, include, exclude in rules:
+                # Nama file contoh yang tidak mungkin cocok dengan pola nama file biasa
+                if relative == "." or not exclude or not exclude.match(relative + "/\0"):
+                    return False
+        return True
+
+    def directories(self):
+        """Menghitung set minimal (direktori, rekursif) yang perlu dijadwalkan di Observer.
+
+        Folder rekursif yang berada di dalam folder rekursif lain, serta direktori file yang sudah
+        tercakup folder rekursif, tidak dijadwalkan lagi agar watch inotify tidak terbuang.
+        """
+        recursive = []
+        for folder in sorted(self.folders):
+            if not any(is_within(folder, parent) for parent in recursive):
+                recursive.append(folder)
+        watches = {(folder, True) for folder in recursive}
+        for file_to_watch in self.files:
+            directory = os.path.dirname(file_to_watch)
+            if not any(is_within(directory, parent) for parent in recursive):
+                watches.add((directory, False))
+        return watches
+
+def is_within(path, folder):
+    """True jika path sama dengan folder atau berada di dalamnya."""
+    return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
+
+def build_watch_rules():
+    """Menyusun ulang aturan pemantauan dari konfigurasi semua bot."""
+    global watch_rules
+    watch_rules = WatchRules(bots.values())
+
+def config_cache_path(path):
+    """Lokasi file cache konfigurasi: .<nama file>.cache di samping settings.json."""
+    return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.cache")
+
+def config_cache_key(path):
+    """Kunci cache konfigurasi: berubah jika isi settings.json, startbot.py atau jumlah CPU berubah.
+
+    Isi settings.json dibandingkan lewat digest, bukan mtime, agar penulisan dengan ukuran sama
+    di filesystem dengan resolusi mtime kasar tidak memakai konfigurasi lama.
+    """
+    script_path = os.path.abspath(__file__)
+    script_stat = os.stat(script_path)
+    return [config_cache_version, script_path, script_stat.st_mtime_ns, script_stat.st_size, file_digest(path), os.cpu_count()]
+
+def read_config(path):
+    """Membaca dan memvalidasi settings.json; mengembalikan (config, {nama bot: konfigurasi bot}).
+
+    Hasil yang sudah divalidasi (path absolut, bot hasil shard, sumber regex aturan pemantauan)
+    disimpan di file cache di samping settings.json dan dipakai ulang selama isi settings.json
+    dan startbot.py tidak berubah.
+    """
+    global config_from_cache
+    cache_path = config_cache_path(path)
+    key = config_cache_key(path)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached["key"] == key:
+            watch_pattern_sources.update(cached["patterns"])
+            config_from_cache = True
+            return cached["config"], cached["bot_configs"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # Cache belum ada atau rusak: baca ulang settings.json
+
+    # Membuka file dengan encoding UTF-8
+    with open(path, 'r', encoding='utf-8') as f:
+        raw_config = json.load(f)
+    bot_configs = {}
+    for bot_config in build_bot_configs(raw_config):
+        name = bot_config["bot_name"]
+        if name in bot_configs:
+            raise ValueError(f"Nama bot {name} dipakai lebih dari sekali.")
+        bot_configs[name] = bot_config
+    config_from_cache = False
+
+    patterns = {}
+    for bot_config in bot_configs.values():
+        for pattern_list in (bot_config.get("watch_include", []), bot_config.get("watch_exclude", default_watch_exclude)):
+            if pattern_list:
+                patterns[watch_pattern_key(pattern_list)] = watch_pattern_source(pattern_list)
+    cached = {"key": key, "config": raw_config, "bot_configs": bot_configs, "patterns": patterns}
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cached, f)
+        os.replace(temp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        console_logger.warning(f"Cache konfigurasi tidak bisa ditulis: {e}")
+    return raw_config, bot_configs
+
+def apply_global_settings():
+    """Menerapkan pengaturan tingkat atas yang berlaku untuk semua bot."""
+    # Pengaturan pengirim notifikasi berlaku untuk semua bot
+    notifier.queue.maxsize = config.get("notification_queue_size", 100)
+    notifier.batch_window = config.get("notification_batch_window", 0.5)
+    notifier.timeout = config.get("notification_timeout", 10)
+    # Semaphore baru hanya dibuat jika batasnya berubah; pemegang slot lama tetap melepas slot lama
+    global start_slots, start_slots_limit
+    limit = config.get("max_concurrent_starts")
+    if limit != start_slots_limit:
+        start_slots_limit = limit
+        start_slots = threading.BoundedSemaphore(limit) if limit else None
+
 def load_config():
-    global config
-    config_path = 'settings.json'  # Menggunakan path relatif ke lokasi skrip utama
-    try:
-        # Membuka file dengan encoding UTF-8
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        # Konversi path relatif menjadi absolut untuk semua file yang diawasi
-        config["files_to_watch"] = [resolve_path(file) for file in config["files_to_watch"]]
-        config["python_script_path"] = resolve_path(config["python_script_path"])
-        config["node_script_path"] = resolve_path(config["node_script_path"])
-        console_logger.info("Konfigurasi berhasil dimuat.")
+    global config, bots
+    try:
+        config, bot_configs = read_config(config_path)
+        bots = {name: Bot(name, bot_config) for name, bot_config in bot_configs.items()}
+        build_watch_rules()
+        apply_global_settings()
+        console_logger.info(f"Konfigurasi berhasil dimuat. Jumlah bot: {len(bots)}")
     except FileNotFoundError:
         error_logger.error(f"File konfigurasi {config_path} tidak ditemukan. Pastikan file tersedia.")
         exit(1)
@@ -60,165 +526,2435 @@ def load_config():
     except UnicodeDecodeError:
         error_logger.error(f"Terjadi masalah saat membaca file konfigurasi. Pastikan file {config_path} menggunakan encoding UTF-8.")
         exit(1)
+    except ValueError as e:
+        error_logger.error(f"Konfigurasi bot tidak valid: {e}")
+        exit(1)
+
+def schedule_config_reload():
+    """Menjadwalkan pembacaan ulang settings.json setelah penulisan file selesai."""
+    global config_reload_timer
+    if config_reload_timer:
+        config_reload_timer.cancel()
+    config_reload_timer = threading.Timer(config_reload_delay, reload_config)
+    config_reload_timer.daemon = True
+    config_reload_timer.start()
+
+def reload_config():
+    """Membaca ulang settings.json dan hanya menerapkan bagian yang berubah.
+
+    Bot baru dijalankan, bot yang dihapus dihentikan, dan bot yang berubah cukup diganti
+    konfigurasinya (inputs, template notifikasi, daftar file, kredensial Telegram). Bot hanya
+    dijalankan ulang jika script_type atau path skripnya berubah.
+    """
+    global config, bots
+    if not file_content_changed(config_path):
+        return
+    try:
+        new_config, bot_configs = read_config(config_path)
+    except (OSError, ValueError) as e:
+        # JSONDecodeError dan UnicodeDecodeError termasuk ValueError
+        error_logger.error(f"Konfigurasi baru tidak dimuat, tetap memakai konfigurasi lama: {e}")
+        console_logger.warning(f"settings.json tidak valid, konfigurasi lama tetap dipakai: {e}")
+        return
+
+    old_bots = bots
+    new_bots = {}
+    added, changed, to_restart = [], [], []
+    for name, bot_config in bot_configs.items():
+        bot = old_bots.get(name)
+        if bot is None:
+            bot = Bot(name, bot_config)
+            added.append(bot)
+        elif bot.config != bot_config:
+            if any(bot.config.get(key) != bot_config.get(key) for key in restart_config_keys):
+                to_restart.append(bot)
+            bot.config = bot_config
+            changed.append(bot)
+        new_bots[name] = bot
+    removed = [bot for name, bot in old_bots.items() if name not in new_bots]
+
+    config = new_config
+    bots = new_bots
+    build_watch_rules()
+    apply_global_settings()
+    update_watches()
+
+    for bot in removed:
+        threading.Thread(target=retire_bot, args=(bot,), name=f"retire-{bot.name}", daemon=True).start()
+    for bot in added:
+        set_bot_state(bot, "starting")
+        threading.Thread(target=run_restarts, args=(bot, True), name=f"start-{bot.name}", daemon=True).start()
+    for bot in to_restart:
+        request_restart(bot)
+    console_logger.info(
+        f"Konfigurasi dimuat ulang: {len(added)} bot baru, {len(removed)} bot dihapus, "
+        f"{len(changed)} bot berubah ({len(to_restart)} dijalankan ulang)."
+    )
+
+def retire_bot(bot):
+    """Menghentikan bot yang dihapus dari settings.json beserta timer-timernya."""
+    with bot.state_lock:
+        bot.retired = True
+        bot.pending_restart = False
+        for timer in (bot.restart_timer, bot.crash_timer):
+            if timer:
+                timer.cancel()
+    with bot.lock:
+        stop_bot(bot)
+    discard_spare(bot)
+    set_bot_state(bot, "stopped")
+    close_output_logger(bot)
+    if bot.config.get("resources", {}).get("cgroup"):
+        try:
+            os.rmdir(cgroup_path(bot))  # Hanya berhasil jika cgroup sudah kosong
+        except OSError:
+            pass
+
+def file_digest(path):
+    """Menghitung digest blake2b dari isi file tanpa memuat seluruh file ke memori."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def file_content_changed(path):
+    """Mengecek apakah isi file benar-benar berubah sejak terakhir dicatat.
+
+    Ukuran dan mtime dibandingkan lebih dulu; digest hanya dihitung ulang jika salah satunya
+    berbeda, sehingga file yang hanya di-touch atau ditulis ulang dengan isi sama diabaikan.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        # File dihapus: dianggap berubah hanya jika sebelumnya pernah tercatat
+        with file_digests_lock:
+            return file_digests.pop(path, None) is not None
+    with file_digests_lock:
+        cached = file_digests.get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return False
+    try:
+        digest = file_digest(path)
+    except (OSError, ValueError) as e:
+        error_logger.error(f"Gagal membaca file {path} untuk pengecekan isi: {e}")
+        return True
+    with file_digests_lock:
+        file_digests[path] = (stat.st_size, stat.st_mtime_ns, digest)
+    return cached is None or cached[2] != digest
+
+def prime_file_digests():
+    """Mencatat digest awal file yang diawasi (dan settings.json) yang belum tercatat."""
+    for file_to_watch in [config_path, *watch_rules.files]:
+        if file_to_watch not in file_digests:
+            file_content_changed(file_to_watch)
+
+class TelegramNotifier:
+    """Mengirim notifikasi Telegram dari thread latar belakang.
+
+    Pesan dimasukkan ke antrean terbatas sehingga start/restart bot tidak pernah menunggu
+    jaringan. Pesan yang menumpuk untuk chat yang sama digabung menjadi satu pesan, koneksi
+    dipakai ulang lewat satu requests.Session, dan respons 429 dihormati sesuai retry_after.
+    """
+
+    max_message_length = 4096  # Batas panjang teks sendMessage dari Telegram
+
+    def __init__(self, max_queue=100, batch_window=0.5, timeout=10, max_retries=5):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_window = batch_window  # Jeda untuk mengumpulkan pesan yang datang berdekatan
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = None
+        self.thread = None
+        self.lock = threading.Lock()
+        # Statistik untuk endpoint /metrics
+        self.sent_total = 0
+        self.failed_total = 0
+        self.latency_sum = 0.0  # Total waktu dari masuk antrean hingga terkirim
+
+    def start(self):
+        """Menjalankan thread pengirim jika belum berjalan."""
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+            self.thread.start()
+
+    def send(self, message, bot_token, chat_id, api_url):
+        """Memasukkan pesan ke antrean tanpa menunggu pengiriman."""
+        self.start()
+        item = (api_url, bot_token, chat_id, message, time.monotonic())
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Buang pesan tertua agar status terbaru tetap terkirim
+            try:
+                dropped = self.queue.get_nowait()
+                error_logger.error(f"Antrean notifikasi penuh, pesan dibuang: {dropped[3]}")
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                error_logger.error(f"Antrean notifikasi penuh, pesan dibuang: {message}")
+
+    def stop(self, timeout=5):
+        """Mengirim sisa pesan di antrean lalu menghentikan thread pengirim."""
+        if not self.thread or not self.thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            time.sleep(self.batch_window)
+            items = [item]
+            stopping = False
+            while True:
+                try:
+                    pending = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                items.append(pending)
+            for target, messages in self._group(items).items():
+                self._deliver(target, messages)
+            if stopping:
+                return
+
+    def _group(self, items):
+        """Mengelompokkan pesan per tujuan (api_url, token, chat_id) dengan urutan tetap."""
+        groups = {}
+        for api_url, bot_token, chat_id, message, queued_at in items:
+            groups.setdefault((api_url, bot_token, chat_id), []).append((message, queued_at))
+        return groups
 
-def send_telegram_notification(message):
-    """Mengirim notifikasi ke Telegram dengan pesan yang diberikan."""
-    bot_token = config.get("telegram_bot_token")
-    chat_id = config.get("telegram_chat_id")
+    def _chunks(self, messages):
+        """Menggabungkan pesan menjadi potongan teks yang tidak melebihi batas Telegram.
+
+        Pesan tunggal yang lebih panjang dari batas dipotong paksa menjadi beberapa potongan.
+        """
+        chunk = ""
+        for message in messages:
+            while len(message) > self.max_message_length:
+                if chunk:
+                    yield chunk
+                    chunk = ""
+                yield message[:self.max_message_length]
+                message = message[self.max_message_length:]
+            candidate = f"{chunk}\n{message}" if chunk else message
+            if chunk and len(candidate) > self.max_message_length:
+                yield chunk
+                candidate = message
+            chunk = candidate
+        if chunk:
+            yield chunk
+
+    def _deliver(self, target, messages):
+        api_url, bot_token, chat_id = target
+        telegram_url = f"{api_url.rstrip('/')}/bot{bot_token}/sendMessage"
+        delivered = True
+        for text in self._chunks([message for message, _ in messages]):
+            payload = {
+                'chat_id': chat_id,
+                'text': text,
+                'parse_mode': 'HTML'  # Pastikan Telegram memproses emotikon dan karakter khusus dengan benar
+            }
+            delivered = self._post(telegram_url, payload) and delivered
+        now = time.monotonic()
+        if delivered:
+            self.sent_total += len(messages)
+            self.latency_sum += sum(now - queued_at for _, queued_at in messages)
+        else:
+            self.failed_total += len(messages)
+
+    def _post(self, telegram_url, payload):
+        """Mengirim satu pesan dengan retry; mengembalikan True jika berhasil."""
+        requests = lazy_import("requests")
+        if self.session is None:
+            self.session = requests.Session()
+        backoff = 1
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(telegram_url, data=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                error_logger.error(f"Error saat mengirim notifikasi ke Telegram: {e}")
+                delay = backoff
+            else:
+                if response.ok:
+                    console_logger.info(f"Notifikasi dikirim ke Telegram: {payload['text']}")
+                    return True
+                if response.status_code == 429:
+                    # Telegram memberi tahu berapa lama harus menunggu sebelum mencoba lagi
+                    try:
+                        delay = response.json()["parameters"]["retry_after"]
+                    except (ValueError, KeyError, TypeError):
+                        delay = backoff
+                    console_logger.warning(f"Telegram membatasi pengiriman, mencoba lagi dalam {delay} detik...")
+                elif response.status_code >= 500:
+                    error_logger.error(f"Gagal mengirim notifikasi ke Telegram: {response.status_code} - {response.text}")
+                    delay = backoff
+                else:
+                    # Kesalahan 4xx lain tidak akan berhasil walaupun diulang
+                    error_logger.error(f"Gagal mengirim notifikasi ke Telegram: {response.status_code} - {response.text}")
+                    return False
+            if attempt < self.max_retries:
+                time.sleep(delay)
+                backoff = min(backoff * 2, 60)
+        error_logger.error(f"Notifikasi ke Telegram gagal setelah {self.max_retries + 1} percobaan: {payload['text']}")
+        return False
+
+# Pengirim notifikasi bersama untuk semua bot
+notifier = TelegramNotifier()
+
+def send_telegram_notification(message, bot=None):
+    """Memasukkan notifikasi Telegram ke antrean pengirim latar belakang."""
+    source = bot.config if bot else config
+    bot_token = source.get("telegram_bot_token")
+    chat_id = source.get("telegram_chat_id")
     
     if not bot_token or not chat_id:
         error_logger.error("Telegram bot token atau chat ID belum diatur dalam konfigurasi.")
         return
     
-    telegram_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    payload = {
-        'chat_id': chat_id,
-        'text': message,
-        'parse_mode': 'HTML'  # Pastikan Telegram memproses emotikon dan karakter khusus dengan benar
-    }
-    
-    try:
-        response = requests.post(telegram_url, data=payload)
-        if response.ok:
-            console_logger.info(f"Notifikasi dikirim ke Telegram: {message}")
+    api_url = source.get("telegram_api_url", "https://api.telegram.org")
+    notifier.send(message, bot_token, chat_id, api_url)
+
+def restart_bot_with_debounce(bot, path=None):
+    """Memulai ulang bot dengan logika debounce (menunggu perubahan tidak ada selama interval tertentu).
+
+    Setiap event baru menunda restart sebesar debounce milik file tersebut, tetapi tidak pernah
+    melewati max_wait sejak event pertama, sehingga penulisan terus-menerus tetap berujung restart.
+    """
+    bot_config = bot.config
+    settings = bot_config["watch_settings"].get(path, {})
+    interval = settings.get("debounce", bot_config["debounce_interval"])
+    max_wait = settings.get("max_wait", bot_config["debounce_max_wait"])
+    now = time.monotonic()
+    if path is not None and path != bot_config.get("shard_data_file"):
+        bot.last_change = now  # Proses cadangan yang lebih tua mungkin sudah membaca isi lama
+    with bot.state_lock:
+        # Batalkan timer sebelumnya jika ada
+        if bot.restart_timer:
+            bot.restart_timer.cancel()
+            bot.debounced_events += 1
+        bot.debounce_paths.add(path)
+        if bot.event_time is None:
+            bot.event_time = now
+        if max_wait is not None:
+            deadline = now + max_wait
+            if bot.debounce_deadline is None or deadline < bot.debounce_deadline:
+                bot.debounce_deadline = deadline
+        delay = interval
+        if bot.debounce_deadline is not None:
+            delay = max(0, min(delay, bot.debounce_deadline - now))
+
+        # Mulai timer baru untuk restart bot
+        bot.restart_timer = threading.Timer(delay, debounce_expired, args=(bot,))
+        bot.restart_timer.daemon = True
+        bot.restart_timer.start()
+    console_logger.info(f"[{bot.name}] Menunggu {round(delay, 1):g} detik untuk memastikan tidak ada perubahan lagi...")
+
+def debounce_expired(bot):
+    """Dipanggil timer debounce: mengosongkan status debounce lalu meminta restart.
+
+    Jika satu-satunya pemicu adalah file data shard, diff baris dihitung sekarang (setelah
+    penulisan file selesai) dan worker hanya di-restart jika baris shard-nya berubah.
+    """
+    with bot.state_lock:
+        bot.restart_timer = None
+        bot.debounce_deadline = None
+        paths, bot.debounce_paths = bot.debounce_paths, set()
+    shard_data_file = bot.config.get("shard_data_file")
+    if shard_data_file and paths == {shard_data_file}:
+        apply_shard_change(bot)
+    else:
+        request_restart(bot)
+
+def request_restart(bot):
+    """Meminta restart lewat koordinator restart milik bot.
+
+    Hanya satu restart yang berjalan per bot. Permintaan yang datang saat bot sedang
+    dihentikan atau dijalankan digabung menjadi paling banyak satu restart susulan.
+    """
+    with bot.state_lock:
+        if bot.retired:
+            return
+        if bot.manual_stop:
+            console_logger.info(f"[{bot.name}] Bot dihentikan manual, permintaan restart diabaikan.")
+            return
+        if bot.state in ("draining", "starting"):
+            if bot.pending_restart:
+                bot.collapsed_restarts += 1
+            bot.pending_restart = True
+            console_logger.info(f"[{bot.name}] Restart sedang berjalan, permintaan baru digabung menjadi satu restart susulan.")
+            return
+        bot.state = "draining"
+    threading.Thread(target=run_restarts, args=(bot,), name=f"restart-{bot.name}", daemon=True).start()
+
+def run_restarts(bot, initial_start=False):
+    """Menjalankan restart dan restart susulan secara berurutan untuk satu bot.
+
+    Dengan initial_start=True, langkah pertama adalah start awal bot (tanpa jeda dan stop).
+    """
+    while True:
+        with bot.state_lock:
+            event_time, bot.event_time = bot.event_time, None
+        if initial_start:
+            with bot.lock:
+                if not start_cancelled(bot):
+                    start_bot(bot)
+            initial_start = False
         else:
-            error_logger.error(f"Gagal mengirim notifikasi ke Telegram: {response.status_code} - {response.text}")
-    except requests.exceptions.RequestException as e:
-        error_logger.error(f"Error saat mengirim notifikasi ke Telegram: {e}")
+            restart_bot(bot)
+        if event_time is not None and bot.process and bot.process.poll() is None:
+            bot.event_to_ready_sum += time.monotonic() - event_time
+            bot.event_to_ready_count += 1
+        with bot.state_lock:
+            if not bot.pending_restart or bot.retired:
+                bot.state = "running" if bot.process and bot.process.poll() is None else "stopped"
+                return
+            bot.pending_restart = False
+            bot.state = "draining"
 
-# Proses bot yang sedang berjalan
-current_process = None
+def start_cancelled(bot):
+    """True jika bot dihentikan manual atau dihapus saat start/restart-nya masih menunggu."""
+    with bot.state_lock:
+        cancelled = bot.manual_stop or bot.retired
+    if cancelled:
+        console_logger.info(f"[{bot.name}] Bot sudah dihentikan, start dibatalkan.")
+    return cancelled
 
-def restart_bot_with_debounce():
-    """Memulai ulang bot dengan logika debounce (menunggu perubahan tidak ada selama interval tertentu)."""
-    global restart_timer
+def set_bot_state(bot, state):
+    with bot.state_lock:
+        bot.state = state
 
-    # Batalkan timer sebelumnya jika ada
-    if restart_timer:
-        restart_timer.cancel()
+class FileEvent:
+    """Event file buatan PollingWatcher dengan atribut yang sama seperti event watchdog."""
 
-    # Mulai timer baru untuk restart bot
-    restart_timer = threading.Timer(debounce_interval, restart_bot)
-    restart_timer.start()
-    console_logger.info(f"Menunggu {debounce_interval} detik untuk memastikan tidak ada perubahan lagi...")
+    is_directory = False
+
+    def __init__(self, event_type, src_path):
+        self.event_type = event_type
+        self.src_path = src_path
+
+class FolderWatcher:
+    """Handler untuk memantau perubahan file sesuai aturan pemantauan semua bot.
+
+    Observer watchdog dan PollingWatcher memanggil dispatch untuk setiap event. Kelas ini
+    tidak mewarisi FileSystemEventHandler agar watchdog tidak perlu diimpor saat startup.
+    """
+
+    def dispatch(self, event):
+        """Meneruskan event ke on_<jenis event>; jenis lain (misalnya opened/closed) diabaikan."""
+        handler = getattr(self, f"on_{event.event_type}", None)
+        if handler is not None:
+            handler(event)
 
-class FolderWatcher(FileSystemEventHandler):
-    """Handler untuk memantau perubahan pada file tertentu yang didefinisikan dalam konfigurasi."""
-    
     def on_modified(self, event):
         """Memantau perubahan pada file yang diawasi."""
         if event.is_directory:
             return
-        
-        # Cek apakah file yang diubah ada dalam daftar files_to_watch
-        if event.src_path in config["files_to_watch"]:
-            console_logger.info(f"Perubahan terdeteksi pada file yang diawasi: {event.src_path} ({event.event_type})")
-            restart_bot_with_debounce()  # Gunakan debounce logic
+        self.handle_change(event.src_path, event, "Perubahan terdeteksi pada file yang diawasi")
 
     def on_created(self, event):
         """Memantau file baru yang ditambahkan di folder yang diawasi."""
         if event.is_directory:
             return
-        
-        # Cek apakah file yang baru dibuat ada dalam daftar files_to_watch
-        if event.src_path in config["files_to_watch"]:
-            console_logger.info(f"File baru terdeteksi: {event.src_path} ({event.event_type})")
-            restart_bot_with_debounce()  # Gunakan debounce logic
+        self.handle_change(event.src_path, event, "File baru terdeteksi")
 
-def stop_bot():
-    """Menghentikan proses bot jika masih aktif."""
-    global current_process
-    if current_process:
-        if current_process.poll() is None:  # Proses masih berjalan
-            console_logger.info("Menghentikan bot...")
-            current_process.terminate()
+    def on_moved(self, event):
+        """Memantau file yang disimpan lewat rename (cara simpan banyak editor)."""
+        if event.is_directory:
+            return
+        self.handle_change(event.dest_path, event, "File diganti")
+
+    def on_deleted(self, event):
+        """Memantau file yang dihapus di monitoring_folder (file di files_to_watch diabaikan)."""
+        if event.is_directory:
+            return
+        with file_digests_lock:
+            file_digests.pop(event.src_path, None)
+        for bot in watch_rules.match(event.src_path, include_files=False):
+            console_logger.info(f"[{bot.name}] File dihapus: {event.src_path} ({event.event_type})")
+            restart_bot_with_debounce(bot, event.src_path)  # Gunakan debounce logic
+
+    def handle_change(self, path, event, description):
+        if path == config_path:
+            schedule_config_reload()
+            return
+
+        # Cari bot yang mengawasi file yang berubah
+        watching_bots = watch_rules.match(path)
+        if not watching_bots:
+            return
+        if not file_content_changed(path):
+            console_logger.info(f"Isi file {path} tidak berubah, restart dilewati.")
+            return
+        for bot in watching_bots:
+            console_logger.info(f"[{bot.name}] {description}: {path} ({event.event_type})")
+            restart_bot_with_debounce(bot, path)  # Gunakan debounce logic
+
+def get_output_logger(bot):
+    """Membuat (sekali) logger file untuk output bot di output_log_dir/<nama bot>.log.
+
+    Logger hanya memasukkan baris ke antrean; penulisan file dan rotasi gzip dilakukan thread
+    QueueListener agar pembaca pipe bot tidak pernah menunggu disk.
+    """
+    with output_logger_lock:
+        if bot.output_logger is not None:
+            return bot.output_logger
+        bot_config = bot.config
+        log_dir = resolve_path(bot_config.get("output_log_dir", "logs"))
+        os.makedirs(log_dir, exist_ok=True)
+        safe_name = re.sub(r'[^\w.-]', '_', bot.name)
+        handler = compressed_file_handler(
+            os.path.join(log_dir, f"{safe_name}.log"),
+            max_bytes=bot_config.get("output_log_max_bytes", 10 * 1024 * 1024),
+            backup_count=bot_config.get("output_log_backups", 5),
+            when=bot_config.get("output_log_rotate_when"),
+        )
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        log_queue = queue.SimpleQueue()
+        bot.output_listener = logging.handlers.QueueListener(log_queue, handler)
+        bot.output_listener.start()
+        output_logger = logging.getLogger(f"bot_output.{bot.name}")
+        output_logger.setLevel(logging.INFO)
+        output_logger.propagate = False  # Output bot tidak ikut ke console_logger
+        output_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+        bot.output_logger = output_logger
+        return output_logger
+
+def close_output_logger(bot):
+    """Menulis sisa antrean log output bot ke file lalu menutup file log-nya."""
+    with output_logger_lock:
+        listener, bot.output_listener = bot.output_listener, None
+        bot.output_logger = None
+    if listener:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+def echo_output(console, chunk):
+    """Memasukkan output bot ke antrean echo konsol tanpa menunggu terminal.
+
+    Jika terminal tertinggal jauh, potongan output dibuang dari konsol saja; output tetap
+    tersimpan di output_tail dan log file.
+    """
+    global echo_thread
+    if echo_thread is None:
+        with output_logger_lock:
+            if echo_thread is None:
+                echo_thread = threading.Thread(target=run_echo, name="output-echo", daemon=True)
+                echo_thread.start()
+    try:
+        echo_queue.put_nowait((console, chunk))
+    except queue.Full:
+        pass
+
+def run_echo():
+    """Thread penulis echo output bot ke konsol."""
+    while True:
+        console, chunk = echo_queue.get()
+        try:
+            console.write(chunk)
+            console.flush()
+        except (OSError, ValueError):
+            pass
+
+class OutputReader:
+    """Membaca stdout atau stderr proses bot di thread terpisah.
+
+    Output diteruskan apa adanya ke konsol (jika echo_output aktif), setiap baris disimpan di
+    ring buffer bot dan ditulis ke log file yang dirotasi, sementara potongan terakhirnya
+    disimpan agar mesin prompt bisa menunggu pola tertentu tanpa memblokir supervisor. Waktu
+    output terakhir dicatat di bot untuk deteksi bot yang macet.
+
+    Dengan spool_path, output dibaca dari file spool yang ditulis langsung oleh bot (mode
+    reattach) mulai dari offset, bukan dari pipe. File spool dikosongkan setelah terbaca
+    melewati spool_max_bytes dan dihapus setelah proses keluar.
+    """
+
+    max_buffer = 65536  # Batas teks yang disimpan untuk pencocokan prompt
+
+    def __init__(self, bot, process, stream, console=None, spool_path=None, offset=0):
+        self.bot = bot
+        self.spool_path = spool_path
+        self.offset = offset
+        self.process_ref = weakref.ref(process)  # Referensi lemah agar bot.readers tetap bisa dibersihkan
+        if spool_path:
+            stream = open(spool_path, 'rb')
+            stream.seek(offset)
+        self.stream = stream
+        self.console = console or sys.stdout
+        self.prefix = "[stderr] " if self.console is sys.stderr else ""
+        self.buffer = ""
+        self.partial = ""  # Sisa baris yang belum diakhiri newline
+        self.closed = False
+        self.condition = threading.Condition()
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.logger = get_output_logger(bot)
+        bot.readers.setdefault(process, []).append(self)
+        self.thread = threading.Thread(target=self._run, name=f"output-{bot.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        fd = self.stream.fileno()
+        console = getattr(self.console, 'buffer', None) if self.bot.config.get("echo_output", True) else None
+        while True:
             try:
-                current_process.wait(timeout=10)  # Tunggu hingga proses selesai
-                console_logger.info("Bot berhasil dihentikan.")
-            except subprocess.TimeoutExpired:
-                console_logger.warning("Proses tidak merespons. Memaksa penghentian...")
-                current_process.kill()  # Paksa berhenti
-                current_process.wait()
-        else:
-            console_logger.info("Proses bot sudah berhenti.")
+                chunk = self._read_spool(fd) if self.spool_path else os.read(fd, 4096)
+            except OSError:
+                chunk = b''
+            if not chunk:
+                break
+            self.bot.last_output = time.monotonic()
+            if console:
+                echo_output(console, chunk)
+            text = self.decoder.decode(chunk)
+            self._record_lines(text)
+            with self.condition:
+                self.buffer = (self.buffer + text)[-self.max_buffer:]
+                self.condition.notify_all()
+        if self.partial:
+            self._record_lines("\n")
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.stream.close()
+        if self.spool_path:
+            try:
+                os.remove(self.spool_path)
+            except OSError:
+                pass
+
+    def _read_spool(self, fd):
+        """Membaca potongan berikutnya dari file spool; b'' berarti proses sudah keluar."""
+        while True:
+            process = self.process_ref()
+            exited = process is None or process.poll() is not None
+            chunk = os.read(fd, 4096)  # Dibaca setelah cek keluar agar sisa output terakhir ikut
+            if chunk:
+                self.offset += len(chunk)
+                return chunk
+            if exited:
+                return b''
+            if self.offset >= self.bot.config.get("spool_max_bytes", 10 * 1024 * 1024):
+                # Bot menulis dengan O_APPEND, jadi setelah dikosongkan tulisan berikutnya mulai dari 0
+                os.truncate(self.spool_path, 0)
+                os.lseek(fd, 0, os.SEEK_SET)
+                self.offset = 0
+            time.sleep(0.1)
+
+    def _record_lines(self, text):
+        """Menyimpan baris lengkap ke ring buffer bot dan log file."""
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()[-self.max_buffer:]
+        for line in lines:
+            line = self.prefix + line.rstrip("\r")
+            self.bot.output_tail.append(line)
+            self.logger.info(line)
+
+    def expect(self, pattern, timeout):
+        """Menunggu hingga pola muncul di output; mengembalikan match atau None jika waktu habis."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                match = pattern.search(self.buffer)
+                if match:
+                    # Output sampai akhir match sudah terpakai dan tidak dicocokkan lagi
+                    self.buffer = self.buffer[match.end():]
+                    return match
+                remaining = deadline - time.monotonic()
+                if self.closed or remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+def answer_prompts(bot, process, reader, parked=False):
+    """Mengirim jawaban untuk setiap prompt segera setelah polanya muncul di output bot.
+
+    parked berarti proses adalah cadangan yang sudah menunggu di prompt pertama. Mengembalikan
+    True jika semua prompt (dan ready_pattern, jika ada) terpenuhi.
+    """
+    bot_config = bot.config
+    default_timeout = bot_config.get("prompt_timeout", 30)
+    for index, rule in enumerate(bot_config["prompts"]):
+        pattern = re.compile(rule["pattern"])
+        if not (parked and index == 0) and reader.expect(pattern, rule.get("timeout", default_timeout)) is None:
+            error_logger.error(f"[{bot.name}] Prompt {rule['pattern']!r} tidak muncul dalam batas waktu.")
+            return False
+        process.stdin.write(rule.get("answer", "") + "\n")  # Menambahkan '\n' untuk menekan Enter
+        process.stdin.flush()  # Pastikan data langsung dikirimkan
+    ready_pattern = bot_config.get("ready_pattern")
+    if ready_pattern:
+        if reader.expect(re.compile(ready_pattern), bot_config.get("ready_timeout", default_timeout)) is None:
+            error_logger.error(f"[{bot.name}] Bot tidak menampilkan tanda siap {ready_pattern!r} dalam batas waktu.")
+            return False
+    return True
+
+def send_inputs(bot, process, parked=False):
+    """Mengirim daftar inputs dengan jeda tetap (untuk bot tanpa aturan prompts)."""
+    bot_config = bot.config
+    if not parked:  # Proses cadangan sudah melewati jeda awal
+        time.sleep(bot_config.get("startup_delay", 2))  # Jeda awal agar bot siap
+    for input_data in bot_config["inputs"]:
+        process.stdin.write(input_data + "\n")  # Menambahkan '\n' untuk menekan Enter
+        process.stdin.flush()  # Pastikan data langsung dikirimkan
+        time.sleep(bot_config.get("input_delay", 1))  # Jeda di antara jawaban
+
+def signal_process(bot, process, force=False):
+    """Mengirim SIGTERM (atau SIGKILL jika force) ke seluruh process group bot.
+
+    Proses yang tidak memimpin process group sendiri (misalnya di Windows) hanya dikirimi
+    sinyal ke proses itu saja.
+    """
+    if process not in bot.group_processes:
+        if process.poll() is None:
+            process.kill() if force else process.terminate()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except ProcessLookupError:
+        pass  # Seluruh anggota grup sudah keluar
+
+def group_alive(pgid):
+    """Mengecek apakah masih ada proses hidup (bukan zombie) di process group pgid."""
+    if not os.path.isdir('/proc'):
+        try:
+            os.killpg(pgid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                fields = f.read().rsplit(b')', 1)[1].split()
+        except (OSError, IndexError):
+            continue  # Proses sudah keluar saat dibaca
+        # Setelah nama proses: state, ppid, pgrp, ...
+        if int(fields[2]) == pgid and fields[0] != b'Z':
+            return True
+    return False
+
+def kill_group_survivors(bot, process):
+    """Memastikan tidak ada proses di process group bot yang masih hidup setelah bot keluar."""
+    if process not in bot.group_processes or not group_alive(process.pid):
+        return
+    console_logger.warning(f"[{bot.name}] Masih ada proses turunan bot (grup {process.pid}) yang hidup. Memaksa penghentian...")
+    signal_process(bot, process, force=True)
+    deadline = time.monotonic() + 1
+    while time.monotonic() < deadline:
+        if not group_alive(process.pid):
+            return
+        time.sleep(0.05)
+    error_logger.error(f"[{bot.name}] Proses di grup {process.pid} tetap hidup setelah SIGKILL.")
+
+def stop_process(bot, process):
+    """Menghentikan satu proses bot beserta process group-nya, memaksa berhenti jika tidak merespons.
+
+    Lama menunggu antara SIGTERM dan SIGKILL diatur lewat stop_timeout (detik).
+    """
+    bot.stopped_processes.add(process)  # Keluarnya proses ini bukan crash
+    if process.poll() is None:  # Proses masih berjalan
+        console_logger.info(f"[{bot.name}] Menghentikan bot (pid {process.pid})...")
+        signal_process(bot, process)
+        try:
+            process.wait(timeout=bot.config.get("stop_timeout", 10))  # Tunggu hingga proses selesai
+            console_logger.info(f"[{bot.name}] Bot berhasil dihentikan.")
+        except subprocess.TimeoutExpired:
+            console_logger.warning(f"[{bot.name}] Proses tidak merespons. Memaksa penghentian...")
+            signal_process(bot, process, force=True)  # Paksa berhenti
+            process.wait()
     else:
-        console_logger.info("Tidak ada proses bot yang berjalan.")
+        console_logger.info(f"[{bot.name}] Proses bot sudah berhenti.")
+    kill_group_survivors(bot, process)
+
+def run_parallel(function, bots, name):
+    """Menjalankan function(bot) untuk setiap bot di thread terpisah dan menunggu semuanya selesai.
+
+    Mengembalikan hasil function dengan urutan yang sama seperti bots.
+    """
+    results = [None] * len(bots)
+
+    def run(index, bot):
+        results[index] = function(bot)
+
+    threads = [
+        threading.Thread(target=run, args=(index, bot), name=f"{name}-{bot.name}", daemon=True)
+        for index, bot in enumerate(bots)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
 
-def restart_bot():
+def stop_bot(bot):
+    """Menghentikan proses bot jika masih aktif."""
+    if bot.process:
+        stop_process(bot, bot.process)
+    else:
+        console_logger.info(f"[{bot.name}] Tidak ada proses bot yang berjalan.")
+
+def restart_bot(bot):
     """Menghentikan bot yang sedang berjalan dan memulai ulang setelah jeda."""
-    console_logger.info(f"Menunggu {config['restart_delay']} detik sebelum memulai ulang bot...")
-    time.sleep(config['restart_delay'])
-    stop_bot()
-    restart_message = config["notifications"].get("restart_message", "⏳🌾 Bot {bot_name} sedang dimulai ulang... 🔄")
-    restart_message = restart_message.format(bot_name=config["bot_name"])
-    send_telegram_notification(restart_message)
-    console_logger.info("Memulai ulang bot...")
-    start_bot()
-
-def start_bot():
-    """Menjalankan skrip bot dengan perintah yang sesuai (Python atau Node.js)."""
-    global current_process
-    script_type = config.get("script_type", "python")  # Dapatkan tipe skrip dari konfigurasi
+    bot_config = bot.config
+    console_logger.info(f"[{bot.name}] Menunggu {bot_config['restart_delay']} detik sebelum memulai ulang bot...")
+    time.sleep(bot_config['restart_delay'])
+    with bot.lock:
+        if start_cancelled(bot):
+            return
+        bot.restart_count += 1
+        restart_message = bot_config["notifications"].get("restart_message", "⏳🌾 Bot {bot_name} sedang dimulai ulang... 🔄")
+        restart_message = restart_message.format(bot_name=bot.name)
+        send_telegram_notification(restart_message, bot)
+        if bot_config.get("restart_strategy", "stop_start") == "overlap" and restart_bot_overlap(bot):
+            return
+        stop_bot(bot)
+        console_logger.info(f"[{bot.name}] Memulai ulang bot...")
+        set_bot_state(bot, "starting")
+        start_bot(bot)
+
+def restart_bot_overlap(bot):
+    """Restart tanpa jeda: jalankan proses baru, pastikan siap, lalu hentikan proses lama.
+
+    Mengembalikan False jika proses baru gagal dijalankan atau berhenti sebelum dianggap siap
+    (misalnya bot tidak bisa berjalan dua salinan sekaligus); pemanggil kemudian kembali ke
+    cara lama, yaitu menghentikan lalu memulai bot.
+    """
+    old_process = bot.process
+    console_logger.info(f"[{bot.name}] Menjalankan proses pengganti sebelum menghentikan proses lama...")
+    new_process, ready = launch_bot_process(bot)
+    if new_process is None:
+        return False
+    if ready is False:
+        console_logger.warning(f"[{bot.name}] Proses pengganti tidak siap. Kembali ke restart biasa...")
+        stop_process(bot, new_process)
+        return False
+
+    # Tanpa aturan prompts, proses baru dianggap siap jika masih hidup setelah masa tunggu kesiapan
+    ready_timeout = 0 if ready else bot.config.get("overlap_ready_timeout", 5)
+    try:
+        exit_code = new_process.wait(timeout=ready_timeout)
+    except subprocess.TimeoutExpired:
+        adopt_process(bot, new_process)
+        console_logger.info(f"[{bot.name}] Proses pengganti (pid {new_process.pid}) siap, menghentikan proses lama...")
+        if old_process:
+            stop_process(bot, old_process)
+        return True
+
+    console_logger.warning(f"[{bot.name}] Proses pengganti berhenti dengan kode {exit_code} sebelum siap. Kembali ke restart biasa...")
+    return False
+
+def read_data_lines(path):
+    """Membaca baris data (akun) yang tidak kosong dari file data."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.rstrip("\r\n") for line in f if line.strip()]
+
+def shard_key(line, key_pattern):
+    """Kunci baris untuk pembagian shard: grup pertama key_pattern (atau seluruh baris)."""
+    if key_pattern:
+        match = re.search(key_pattern, line)
+        if match:
+            return match.group(1) if match.groups() else match.group(0)
+    return line
+
+def shard_lines(bot, lines):
+    """Baris data milik worker ini.
+
+    Pembagian memakai hash dari kunci baris, bukan urutan baris, sehingga menyisipkan atau
+    mengubah satu baris tidak menggeser baris lain ke worker berbeda.
+    """
+    bot_config = bot.config
+    key_pattern = bot_config["shard"].get("key_pattern")
+    return [
+        line for line in lines
+        if int.from_bytes(hashlib.blake2b(shard_key(line, key_pattern).encode('utf-8'), digest_size=8).digest(), 'big')
+        % bot_config["shard_count"] == bot_config["shard_index"]
+    ]
+
+def write_shard_file(bot, lines=None):
+    """Menulis ulang file shard worker dari file data secara atomik."""
+    bot_config = bot.config
+    if lines is None:
+        lines = shard_lines(bot, read_data_lines(bot_config["shard_data_file"]))
+    shard_file = bot_config["shard_file"]
+    os.makedirs(os.path.dirname(shard_file), exist_ok=True)
+    temp_file = f"{shard_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        f.write("".join(line + "\n" for line in lines))
+    os.replace(temp_file, shard_file)
+    bot.shard_lines = lines
+    console_logger.info(f"[{bot.name}] Shard berisi {len(lines)} baris: {shard_file}")
+
+def apply_shard_change(bot):
+    """Menangani perubahan file data untuk satu worker shard berdasarkan diff baris.
+
+    Dipanggil saat debounce selesai, sehingga file data yang ditulis bertahap (dikosongkan lalu
+    diisi) dibaca dalam keadaan utuh. Worker yang isi shard-nya tidak berubah dibiarkan
+    berjalan. Jika hanya ada baris baru, shard.send_new_lines aktif dan stdin bot masih terbuka,
+    baris baru dikirim ke stdin tanpa restart. Selain itu hanya worker ini yang di-restart.
+    """
+    bot_config = bot.config
+    try:
+        new_lines = shard_lines(bot, read_data_lines(bot_config["shard_data_file"]))
+    except OSError as e:
+        error_logger.error(f"[{bot.name}] Gagal membaca file data: {e}")
+        return
+    old_lines = bot.shard_lines
+    if new_lines == old_lines:
+        console_logger.info(f"[{bot.name}] Baris shard tidak berubah, worker tetap berjalan.")
+        with bot.state_lock:
+            bot.event_time = None  # Tidak ada restart yang diukur untuk event ini
+        return
+    if old_lines is not None:
+        remaining = collections.Counter(new_lines)
+        remaining.subtract(old_lines)
+        only_added = all(count >= 0 for count in remaining.values())
+        process = bot.process
+        if (
+            only_added
+            and bot_config["shard"].get("send_new_lines", False)
+            and bot_config.get("keep_stdin_open", False)
+            and bot.state == "running"
+            and process and process.poll() is None and process.stdin is not None
+        ):
+            added = list(remaining.elements())
+            try:
+                with bot.stdin_lock:
+                    for line in added:
+                        process.stdin.write(line + "\n")
+                    process.stdin.flush()
+            except (OSError, ValueError) as e:
+                error_logger.error(f"[{bot.name}] Gagal mengirim baris baru, bot akan di-restart: {e}")
+            else:
+                write_shard_file(bot, new_lines)
+                console_logger.info(f"[{bot.name}] {len(added)} baris baru dikirim ke bot tanpa restart.")
+                with bot.state_lock:
+                    bot.event_time = None
+                return
+    console_logger.info(f"[{bot.name}] Baris shard berubah ({len(old_lines or [])} -> {len(new_lines)} baris).")
+    bot.last_change = time.monotonic()  # Proses cadangan membaca shard lama
+    request_restart(bot)
+
+def build_bot_command(bot):
+    """Menentukan perintah untuk menjalankan skrip bot (Python atau Node.js)."""
+    bot_config = bot.config
+    script_type = bot_config.get("script_type", "python")  # Dapatkan tipe skrip dari konfigurasi
+    # Worker shard bisa menerima path file shard sebagai argumen tambahan
+    extra_args = [bot_config["shard_file"]] if bot_config.get("shard_group") and bot_config["shard"].get("pass_as_argument") else []
     if script_type == "python":
         command = "python" if platform.system() == "Windows" else "python3"
-        script_path = config["python_script_path"]
-    elif script_type == "node":
-        command = "node"  # Gunakan "node" untuk menjalankan skrip Node.js
-        script_path = config["node_script_path"]
-    else:
-        error_logger.error(f"Tipe skrip {script_type} tidak valid. Hanya mendukung 'python' atau 'node'.")
-        return
-    
+        return [command, bot_config["python_script_path"], *extra_args]
+    if script_type == "node":
+        return ["node", bot_config["node_script_path"], *extra_args]  # Gunakan "node" untuk menjalankan skrip Node.js
+    error_logger.error(f"[{bot.name}] Tipe skrip {script_type} tidak valid. Hanya mendukung 'python' atau 'node'.")
+    return None
+
+@contextlib.contextmanager
+def start_slot(bot):
+    """Membatasi urutan start yang berjalan bersamaan untuk semua bot.
+
+    max_concurrent_starts membatasi jumlahnya, sedangkan start_spacing (detik) memberi jarak
+    minimal antar awal start sehingga restart yang mengantre tersebar dari waktu ke waktu.
+    """
+    global last_start_time
+    slots = start_slots
+    if slots is not None and not slots.acquire(blocking=False):
+        console_logger.info(f"[{bot.name}] Menunggu giliran start (maksimal {start_slots_limit} bersamaan)...")
+        slots.acquire()
+    try:
+        spacing = config.get("start_spacing", 0)
+        if spacing:
+            with start_spacing_lock:
+                delay = last_start_time + spacing - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                last_start_time = time.monotonic()
+        yield
+    finally:
+        if slots is not None:
+            slots.release()
+
+def output_modes(bot):
+    """Menentukan (use_prompts, capture_stdout, capture_output) untuk proses bot."""
+    bot_config = bot.config
+    use_prompts = bool(bot_config.get("use_inputs", True) and bot_config.get("prompts"))
+    # Deteksi bot macet tanpa heartbeat_file membutuhkan stdout dan stderr yang dibaca supervisor
+    health = bot_config.get("health", {})
+    track_output = bool(health.get("idle_timeout") and not health.get("heartbeat_file"))
+    capture_output = bot_config.get("capture_output", True) or track_output
+    return use_prompts, use_prompts or capture_output, capture_output
+
+def spawn_bot_process(bot, command):
+    """Menjalankan proses bot beserta pembaca outputnya; mengembalikan (proses, pembaca stdout)."""
+    bot_config = bot.config
+    _, capture_stdout, capture_output = output_modes(bot)
+    env = None
+    if capture_stdout:
+        # Output Python ke pipe di-buffer; paksa unbuffered agar prompt langsung terbaca
+        env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+    if bot_config.get("shard_group"):
+        try:
+            write_shard_file(bot)
+        except OSError as e:
+            # Jangan sampai dianggap interpreter tidak ditemukan oleh launch_bot_process
+            raise RuntimeError(f"File shard tidak bisa disiapkan dari {bot_config['shard_data_file']}: {e.strerror or e}") from e
+        env = {
+            **(env or os.environ),
+            bot_config["shard"].get("env_var", "SHARD_FILE"): bot_config["shard_file"],
+            "SHARD_INDEX": str(bot_config["shard_index"]),
+            "SHARD_COUNT": str(bot_config["shard_count"]),
+        }
+    # Di POSIX bot dijalankan di session sendiri agar proses turunannya (helper, wrapper npm)
+    # ikut dihentikan bersama bot
+    new_group = os.name == "posix" and bot_config.get("process_group", True)
+    stdout = subprocess.PIPE if capture_stdout else None  # Output dibaca untuk prompt/deteksi macet
+    stderr = subprocess.PIPE if capture_output else None
+    spools = {}
+    if config.get("reattach", False):
+        # Pipe akan putus saat supervisor berhenti, jadi output ditulis ke file spool agar bot
+        # tetap hidup dan bisa diambil alih supervisor berikutnya
+        spool_dir = os.path.join(resolve_path(bot_config.get("output_log_dir", "logs")), "spool")
+        os.makedirs(spool_dir, exist_ok=True)
+        safe_name = re.sub(r'[^\w.-]', '_', bot.name)
+        spool_base = os.path.join(spool_dir, f"{safe_name}.{time.time_ns()}")
+        if capture_stdout:
+            spools["stdout"] = f"{spool_base}.stdout"
+            stdout = open(spools["stdout"], 'ab')
+        if capture_output:
+            spools["stderr"] = f"{spool_base}.stderr"
+            stderr = open(spools["stderr"], 'ab')
+    # Batas resources dipasang di proses anak sebelum exec agar semua proses turunan bot ikut terbatas
+    preexec_fn = resource_preexec(bot) if bot_config.get("resources") and os.name == "posix" else None
+    popen_args = dict(
+        stdin=subprocess.PIPE,  # Mengatur stdin agar dapat mengirimkan input
+        stdout=stdout,
+        stderr=stderr,
+        env=env,
+        start_new_session=new_group,
+        text=True  # Memastikan input dalam format teks (bukan byte)
+    )
     try:
         # Menjalankan skrip dengan perintah yang sesuai (Python atau Node.js)
-        current_process = subprocess.Popen(
-            [command, script_path],
-            stdin=subprocess.PIPE,  # Mengatur stdin agar dapat mengirimkan input
-            text=True  # Memastikan input dalam format teks (bukan byte)
-        )
+        try:
+            process = subprocess.Popen(command, preexec_fn=preexec_fn, **popen_args)
+        except subprocess.SubprocessError as e:
+            if preexec_fn is None:
+                raise
+            # Pemasangan di proses anak gagal sebelum exec; pasang setelah spawn agar penyebabnya tercatat
+            error_logger.error(f"[{bot.name}] Batas resources gagal dipasang sebelum exec ({e}), dipasang setelah spawn.")
+            preexec_fn = None
+            process = subprocess.Popen(command, **popen_args)
+    finally:
+        for spool in (stdout, stderr):
+            if hasattr(spool, 'close'):
+                spool.close()  # Bot sudah memegang salinan file spool-nya sendiri
+    if new_group:
+        bot.group_processes.add(process)
+    if bot_config.get("resources"):
+        apply_resource_limits(bot, process, applied_in_child=preexec_fn is not None)
+    stdout_reader = None
+    if capture_stdout:
+        stdout_reader = OutputReader(bot, process, process.stdout, spool_path=spools.get("stdout"))
+    if capture_output:
+        OutputReader(bot, process, process.stderr, sys.stderr, spool_path=spools.get("stderr"))
+    return process, stdout_reader
 
-        console_logger.info("Menunggu bot siap menerima input...")
-        start_message = config["notifications"].get("start_message", "⏳🌾 {bot_name} telah dimulai! 🚀")
-        start_message = start_message.format(bot_name=config["bot_name"])
-        send_telegram_notification(start_message)
-        time.sleep(2)  # Jeda awal agar bot siap
+# Kelas ionice: nama di settings.json -> nomor kelas ioprio
+ionice_classes = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+def resource_preexec(bot):
+    """Membuat preexec_fn yang memasang batas resources di proses anak sebelum exec.
+
+    cpu_affinity, nice, rlimit_as_mb, rlimit_nofile dan perpindahan ke cgroup dipasang sebelum
+    skrip bot berjalan, sehingga semua proses turunannya ikut terbatas. Direktori cgroup beserta
+    memory.max/cpu.max disiapkan di supervisor; jika gagal, bot berjalan tanpa cgroup.
+    """
+    resources = bot.config["resources"]
+    affinity = resources.get("cpu_affinity")
+    nice = resources.get("nice")
+    rlimits = []
+    if resource is not None:
+        if "rlimit_as_mb" in resources:
+            rlimits.append((resource.RLIMIT_AS, resources["rlimit_as_mb"] * 1024 * 1024))
+        if "rlimit_nofile" in resources:
+            rlimits.append((resource.RLIMIT_NOFILE, resources["rlimit_nofile"]))
+    cgroup_procs = None
+    if resources.get("cgroup"):
+        try:
+            cgroup_procs = os.path.join(prepare_cgroup(bot), "cgroup.procs")
+        except OSError as e:
+            error_logger.error(f"[{bot.name}] Gagal menyiapkan cgroup: {e}")
+
+    def preexec():
+        # Berjalan di proses anak setelah fork: hanya panggilan sistem sederhana, tanpa logging
+        if affinity is not None:
+            os.sched_setaffinity(0, affinity)
+        if nice is not None:
+            os.setpriority(os.PRIO_PROCESS, 0, nice)
+        for kind, limit in rlimits:
+            resource.setrlimit(kind, (limit, limit))
+        if cgroup_procs:
+            with open(cgroup_procs, 'w') as f:
+                f.write(str(os.getpid()))
+    return preexec
+
+def apply_resource_limits(bot, process, applied_in_child=False):
+    """Menerapkan pengaturan resources bot yang belum terpasang ke proses yang baru dijalankan.
+
+    resources berisi cpu_affinity (daftar nomor CPU), nice, ionice_class/ionice_level,
+    rlimit_as_mb, rlimit_nofile dan cgroup (memory_max_mb, cpu_max). Dengan applied_in_child
+    (lihat resource_preexec) hanya ionice yang tersisa, karena Python tidak punya API ioprio;
+    ionice dipasang sesaat setelah spawn sehingga proses turunan yang dibuat sebelumnya tidak
+    ikut. Tanpa preexec (fallback), semua batas dipasang setelah spawn dengan celah yang sama.
+    Pengaturan yang tidak didukung sistem hanya dicatat sebagai error.
+    """
+    resources = bot.config["resources"]
+    pid = process.pid
+    try:
+        if "cpu_affinity" in resources and not applied_in_child:
+            os.sched_setaffinity(pid, resources["cpu_affinity"])
+        if "nice" in resources and not applied_in_child:
+            os.setpriority(os.PRIO_PROCESS, pid, resources["nice"])
+        if "ionice_class" in resources:
+            ionice_class = ionice_classes.get(resources["ionice_class"], resources["ionice_class"])
+            command = ["ionice", "-c", str(ionice_class), "-p", str(pid)]
+            if "ionice_level" in resources and ionice_class != 3:
+                command[3:3] = ["-n", str(resources["ionice_level"])]
+            subprocess.run(command, check=True, capture_output=True)
+        if applied_in_child:
+            return
+        if resource is not None:
+            if "rlimit_as_mb" in resources:
+                limit = resources["rlimit_as_mb"] * 1024 * 1024
+                resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+            if "rlimit_nofile" in resources:
+                limit = resources["rlimit_nofile"]
+                resource.prlimit(pid, resource.RLIMIT_NOFILE, (limit, limit))
+        if resources.get("cgroup"):
+            with open(os.path.join(prepare_cgroup(bot), "cgroup.procs"), 'w') as f:
+                f.write(str(pid))
+    except (OSError, ValueError, AttributeError, subprocess.CalledProcessError) as e:
+        error_logger.error(f"[{bot.name}] Gagal menerapkan batas resources: {e}")
+
+def cgroup_path(bot):
+    """Direktori cgroup v2 milik bot di bawah cgroup_root (default /sys/fs/cgroup/startbot)."""
+    root = bot.config["resources"]["cgroup"].get("root", "/sys/fs/cgroup/startbot")
+    return os.path.join(root, re.sub(r'[^\w.-]', '_', bot.name))
+
+def prepare_cgroup(bot):
+    """Membuat cgroup v2 milik bot dengan memory.max/cpu.max; mengembalikan path-nya."""
+    settings = bot.config["resources"]["cgroup"]
+    path = cgroup_path(bot)
+    root = os.path.dirname(path)
+    if not os.path.exists(os.path.join(os.path.dirname(root), "cgroup.controllers")):
+        raise OSError(f"cgroup v2 tidak tersedia di {os.path.dirname(root)}")
+    os.makedirs(path, exist_ok=True)
+    # Controller harus diaktifkan di setiap induk agar file memory.max/cpu.max tersedia
+    for parent in (os.path.dirname(root), root):
+        try:
+            with open(os.path.join(parent, "cgroup.subtree_control"), 'w') as f:
+                f.write("+memory +cpu")
+        except OSError:
+            pass  # Sudah aktif atau diatur oleh sistem
+    if "memory_max_mb" in settings:
+        with open(os.path.join(path, "memory.max"), 'w') as f:
+            f.write(str(settings["memory_max_mb"] * 1024 * 1024))
+    if "cpu_max" in settings:
+        with open(os.path.join(path, "cpu.max"), 'w') as f:
+            f.write(str(settings["cpu_max"]))  # Misalnya "50000 100000" = setengah CPU
+    return path
+
+def read_resource_usage(bot, process):
+    """Ringkasan batas dan pemakaian resources bot untuk perintah status."""
+    resources = bot.config.get("resources")
+    if not resources or not process or process.poll() is not None:
+        return None
+    usage = {}
+    try:
+        usage["cpu_affinity"] = sorted(os.sched_getaffinity(process.pid))
+        usage["nice"] = os.getpriority(os.PRIO_PROCESS, process.pid)
+        if resource is not None:
+            usage["rlimit_as"] = resource.prlimit(process.pid, resource.RLIMIT_AS)[0]
+            usage["rlimit_nofile"] = resource.prlimit(process.pid, resource.RLIMIT_NOFILE)[0]
+    except (OSError, AttributeError):
+        pass
+    if resources.get("cgroup"):
+        path = cgroup_path(bot)
+        try:
+            with open(os.path.join(path, "memory.current")) as f:
+                usage["cgroup_memory_bytes"] = int(f.read())
+            with open(os.path.join(path, "cpu.stat")) as f:
+                stat = dict(line.split() for line in f if line.strip())
+            usage["cgroup_cpu_seconds"] = int(stat["usage_usec"]) / 1e6
+            usage["cgroup_throttled_seconds"] = int(stat.get("throttled_usec", 0)) / 1e6
+            with open(os.path.join(path, "memory.events")) as f:
+                usage["cgroup_oom_kills"] = int(dict(line.split() for line in f if line.strip()).get("oom_kill", 0))
+        except (OSError, ValueError, KeyError):
+            pass
+    return usage
+
+def launch_bot_process(bot):
+    """Menjalankan proses bot baru (atau memakai proses cadangan) dan mengirim inputnya.
+
+    Mengembalikan (proses, siap): proses bernilai None jika gagal dijalankan, sedangkan siap
+    bernilai True/False jika kesiapan dicek lewat aturan prompts dan None jika tidak diketahui.
+    """
+    bot_config = bot.config
+    command = build_bot_command(bot)
+    if command is None:
+        return None, False
+    use_prompts, _, _ = output_modes(bot)
+
+    process = None
+    ready = None
+    with start_slot(bot):
+        try:
+            spare = take_spare(bot)
+            if spare:
+                process, stdout_reader = spare
+                console_logger.info(f"[{bot.name}] Memakai proses cadangan (pid {process.pid}) yang sudah siap...")
+            else:
+                process, stdout_reader = spawn_bot_process(bot, command)
+
+            console_logger.info(f"[{bot.name}] Menunggu bot siap menerima input...")
+            start_message = bot_config["notifications"].get("start_message", "⏳🌾 {bot_name} telah dimulai! 🚀")
+            start_message = start_message.format(bot_name=bot.name)
+            send_telegram_notification(start_message, bot)
+
+            # Kirim input jika use_inputs diaktifkan
+            if use_prompts:
+                ready = answer_prompts(bot, process, stdout_reader, parked=bool(spare))
+            elif bot_config.get("use_inputs", True):  # Default adalah True jika tidak ada konfigurasi
+                send_inputs(bot, process, parked=bool(spare))
+            if not bot_config.get("keep_stdin_open", False):
+                process.stdin.close()  # Tutup input setelah selesai menulis (kecuali untuk send-input)
+
+        except FileNotFoundError:
+            error_logger.error(f"{command[0]} tidak ditemukan. Pastikan {command[0]} sudah terinstal.")
+        except Exception as e:
+            error_logger.error(f"[{bot.name}] Terjadi kesalahan: {e}")
+            error_message = bot_config["notifications"].get("error_message", "⏳🌾 Error terjadi pada bot {bot_name}: {error_message} ⚠️")
+            error_message = error_message.format(bot_name=bot.name, error_message=str(e))
+            send_telegram_notification(error_message, bot)
+            ready = False
+    if process is not None and bot_config.get("warm_standby", False):
+        # Siapkan cadangan berikutnya di latar belakang untuk restart selanjutnya
+        threading.Thread(target=prepare_spare, args=(bot,), name=f"spare-{bot.name}", daemon=True).start()
+    # Proses yang sudah terlanjur berjalan tetap dikembalikan agar bisa dihentikan nanti
+    return process, ready
+
+def prepare_spare(bot):
+    """Menyiapkan proses cadangan (warm standby) yang menunggu di prompt pertamanya.
+
+    Tanpa aturan prompts, cadangan dianggap siap setelah startup_delay berlalu. Cadangan yang
+    gagal mencapai titik tersebut langsung dihentikan.
+    """
+    bot_config = bot.config
+    command = build_bot_command(bot)
+    if command is None:
+        return
+    with bot.spare_lock:
+        if bot.spare or bot.spare_starting:
+            return
+        bot.spare_starting = True
+    process = None
+    parked = False
+    spawned_at = time.monotonic()
+    with start_slot(bot):  # Cadangan juga dihitung sebagai urutan start
+        try:
+            process, stdout_reader = spawn_bot_process(bot, command)
+            use_prompts, _, _ = output_modes(bot)
+            if use_prompts:
+                first_prompt = bot_config["prompts"][0]
+                timeout = first_prompt.get("timeout", bot_config.get("prompt_timeout", 30))
+                parked = stdout_reader.expect(re.compile(first_prompt["pattern"]), timeout) is not None
+            else:
+                try:
+                    process.wait(timeout=bot_config.get("startup_delay", 2))
+                except subprocess.TimeoutExpired:
+                    parked = True
+        except Exception as e:
+            error_logger.error(f"[{bot.name}] Gagal menyiapkan proses cadangan: {e}")
+    with bot.spare_lock:
+        bot.spare_starting = False
+        usable = parked and process.poll() is None and bot.config is bot_config and not (bot.retired or bot.manual_stop)
+        if usable:
+            bot.spare = (process, stdout_reader, bot_config, spawned_at)
+    if usable:
+        console_logger.info(f"[{bot.name}] Proses cadangan (pid {process.pid}) siap di prompt pertama.")
+    elif process is not None:
+        console_logger.warning(f"[{bot.name}] Proses cadangan tidak siap, dihentikan.")
+        stop_process(bot, process)
 
-        # Kirim input jika use_inputs diaktifkan
-        if config.get("use_inputs", True):  # Default adalah True jika tidak ada konfigurasi
-            for input_data in config["inputs"]:
-                current_process.stdin.write(input_data + "\n")  # Menambahkan '\n' untuk menekan Enter
-                current_process.stdin.flush()  # Pastikan data langsung dikirimkan
-                time.sleep(1)  # Jeda 1 detik di antara jawaban
-            current_process.stdin.close()  # Tutup input setelah selesai menulis
+def take_spare(bot):
+    """Mengambil proses cadangan yang masih layak dipakai; mengembalikan (proses, pembaca) atau None.
 
+    Cadangan dibuang jika konfigurasi bot sudah berubah, prosesnya sudah mati, atau file yang
+    diawasi berubah setelah cadangan dijalankan (isi lama mungkin sudah dibaca), kecuali
+    standby_reuse_on_change diaktifkan untuk bot yang baru membaca file setelah prompt pertama.
+    """
+    with bot.spare_lock:
+        spare, bot.spare = bot.spare, None
+    if spare is None:
+        return None
+    process, stdout_reader, spare_config, spawned_at = spare
+    stale = spare_config is not bot.config or (
+        bot.last_change is not None and bot.last_change >= spawned_at
+        and not bot.config.get("standby_reuse_on_change", False)
+    )
+    if stale or process.poll() is not None:
+        console_logger.info(f"[{bot.name}] Proses cadangan (pid {process.pid}) sudah usang, dibuang.")
+        stop_process(bot, process)
+        return None
+    return process, stdout_reader
+
+def discard_spare(bot):
+    """Menghentikan proses cadangan bot jika ada."""
+    with bot.spare_lock:
+        spare, bot.spare = bot.spare, None
+    if spare:
+        stop_process(bot, spare[0])
+
+def start_bot(bot):
+    """Menjalankan skrip bot dengan perintah yang sesuai (Python atau Node.js)."""
+    process, _ = launch_bot_process(bot)
+    if process is not None:
+        adopt_process(bot, process)
+
+def adopt_process(bot, process):
+    """Menjadikan proses sebagai proses aktif bot dan menunggu keluarnya di thread terpisah."""
+    bot.process = process
+    bot.started_at = time.monotonic()
+    bot.rss_over_count = 0
+    threading.Thread(target=wait_for_exit, args=(bot, process), name=f"wait-{bot.name}-{process.pid}", daemon=True).start()
+    save_state()
+
+def wait_for_exit(bot, process):
+    """Menunggu proses bot keluar (blocking, tanpa polling) lalu menangani crash."""
+    exit_code = process.wait()
+    if process in bot.stopped_processes or bot.process is not process:
+        return  # Dihentikan atau diganti oleh supervisor
+    kill_group_survivors(bot, process)  # Proses turunan bot yang crash tidak boleh tertinggal
+    # Beri kesempatan pembaca output menghabiskan sisa pipe agar tail output lengkap
+    for reader in bot.readers.get(process, []):
+        reader.thread.join(timeout=1)
+    bot.last_exit_code = exit_code
+    handle_crash(bot, process, exit_code)
+
+def handle_crash(bot, process, exit_code):
+    """Mengirim notifikasi crash dan menjadwalkan restart dengan backoff eksponensial."""
+    bot_config = bot.config
+    console_logger.warning(f"[{bot.name}] Bot berhenti tiba-tiba dengan kode {exit_code}.")
+    with bot.state_lock:
+        if bot.state == "running":  # Restart yang sedang berjalan tetap memegang statusnya sendiri
+            bot.state = "stopped"
+    bot.crash_count += 1
+    crash_message = bot_config["notifications"].get("crash_message", "⏳🌾 Bot {bot_name} berhenti dengan kode {exit_code} ⚠️")
+    crash_message = crash_message.format(bot_name=bot.name, exit_code=exit_code)
+    tail = output_tail_text(bot, bot_config.get("crash_tail_lines", 10))
+    if tail:
+        # Pesan dikirim dengan parse_mode HTML, jadi output bot harus di-escape
+        crash_message += "\n" + pre(tail)
+    send_telegram_notification(crash_message, bot)
+    if not bot_config.get("restart_on_crash", True):
+        return
+
+    # Hanya crash dalam jendela waktu terakhir yang dihitung untuk backoff dan batas crash loop
+    now = time.monotonic()
+    window = bot_config.get("crash_loop_window", 300)
+    bot.crash_times.append(now)
+    while bot.crash_times and now - bot.crash_times[0] > window:
+        bot.crash_times.popleft()
+    crash_count = len(bot.crash_times)
+    crash_loop_limit = bot_config.get("crash_loop_limit", 5)
+    if crash_count > crash_loop_limit:
+        error_logger.error(f"[{bot.name}] Bot crash {crash_count} kali dalam {window} detik, restart otomatis dihentikan.")
+        loop_message = bot_config["notifications"].get("crash_loop_message", "⏳🌾 Bot {bot_name} terus crash, restart otomatis dihentikan ⛔")
+        send_telegram_notification(loop_message.format(bot_name=bot.name, exit_code=exit_code), bot)
+        return
+
+    delay = min(
+        bot_config.get("crash_backoff_initial", 1) * bot_config.get("crash_backoff_factor", 2) ** (crash_count - 1),
+        bot_config.get("crash_backoff_max", 300),
+    )
+    console_logger.info(f"[{bot.name}] Memulai ulang bot setelah crash dalam {delay} detik...")
+    bot.crash_timer = threading.Timer(delay, restart_after_crash, args=(bot, process))
+    bot.crash_timer.daemon = True
+    bot.crash_timer.start()
+
+def restart_after_crash(bot, crashed_process):
+    """Menjalankan ulang bot yang crash, kecuali sudah dijalankan ulang lewat jalur lain."""
+    if bot.process is crashed_process:
+        request_restart(bot)
+
+def start_all_bots():
+    """Menjalankan semua bot secara paralel agar jeda input satu bot tidak menunda bot lain.
+
+    Dengan reattach aktif, bot yang prosesnya masih hidup dari supervisor sebelumnya diambil
+    alih dan tidak dijalankan ulang.
+    """
+    reattached = restore_state() if config.get("reattach", False) else []
+    threads = []
+    for bot in bots.values():
+        if bot in reattached:
+            continue
+        set_bot_state(bot, "starting")
+        thread = threading.Thread(target=run_restarts, args=(bot, True), name=f"start-{bot.name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+def read_process_stats(pid):
+    """Membaca waktu CPU, RSS, jumlah thread dan FD terbuka sebuah proses dari /proc."""
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        # Nama proses bisa mengandung spasi, jadi field dihitung setelah tanda kurung penutup
+        fields = f.read().rsplit(')', 1)[1].split()
+    stats = {"cpu_seconds": (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')}
+    with open(f"/proc/{pid}/status", 'r') as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                stats["rss_bytes"] = int(line.split()[1]) * 1024
+            elif line.startswith("Threads:"):
+                stats["threads"] = int(line.split()[1])
+    stats["open_fds"] = len(os.listdir(f"/proc/{pid}/fd"))
+    return stats
+
+class AdoptedProcess:
+    """Proses bot dari supervisor sebelumnya yang diambil alih lewat file state.
+
+    Proses ini bukan anak supervisor, jadi keluarnya dipantau lewat /proc dan kode keluarnya
+    tidak diketahui. Kelas ini menyediakan bagian API subprocess.Popen yang dipakai supervisor.
+    """
+
+    stdin = None  # stdin bot lama sudah tertutup bersama supervisor sebelumnya
+
+    def __init__(self, pid, start_time, cmdline):
+        self.pid = pid
+        self.start_time = start_time
+        self.args = cmdline
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            identity = read_process_identity(self.pid)
+            if identity is None or identity[0] != self.start_time:
+                self.returncode = "tidak diketahui"
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(0.2)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+def read_process_identity(pid):
+    """(start time, cmdline) proses yang masih hidup dari /proc, atau None jika sudah tidak ada.
+
+    Start time (dalam clock tick sejak boot) bersama PID mengenali satu proses secara unik
+    walaupun PID dipakai ulang.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", 'rb') as f:
+            fields = f.read().rsplit(b')', 1)[1].split()
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            cmdline = [part.decode('utf-8', 'replace') for part in f.read().split(b'\0')[:-1]]
+    except (OSError, IndexError):
+        return None
+    if fields[0] == b'Z':
+        return None  # Zombie sudah keluar
+    return int(fields[19]), cmdline
+
+def state_path():
+    return resolve_path(config.get("state_file", "startbot_state.json"))
+
+def save_state():
+    """Menyimpan PID, start time, counter bot dan digest file ke state_file secara atomik.
+
+    Hanya aktif jika reattach diaktifkan. File ditulis ke file sementara lalu diganti dengan
+    os.replace sehingga supervisor berikutnya tidak pernah membaca state yang setengah jadi.
+    """
+    if not config.get("reattach", False):
+        return
+    state = {"bots": {}}
+    for bot in list(bots.values()):
+        entry = {"restart_count": bot.restart_count, "crash_count": bot.crash_count}
+        process = bot.process
+        identity = read_process_identity(process.pid) if process and process.poll() is None else None
+        if identity:
+            entry["process"] = {
+                "pid": process.pid,
+                "start_time": identity[0],
+                "cmdline": identity[1],
+                "process_group": process in bot.group_processes,
+                "spools": [
+                    {"path": reader.spool_path, "offset": reader.offset, "stderr": bool(reader.prefix)}
+                    for reader in bot.readers.get(process, []) if reader.spool_path
+                ],
+            }
+        state["bots"][bot.name] = entry
+    with file_digests_lock:
+        state["file_digests"] = {path: list(value) for path, value in file_digests.items()}
+    path = state_path()
+    with state_lock:
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except OSError as e:
+            error_logger.error(f"Gagal menyimpan state ke {path}: {e}")
+
+def restore_state():
+    """Memuat state_file dan mengambil alih bot yang masih berjalan; mengembalikan bot tersebut.
+
+    Counter restart/crash dan digest file dipulihkan. File yang berubah selama supervisor mati
+    memicu restart bot yang diambil alih seperti perubahan file biasa.
+    """
+    path = state_path()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
     except FileNotFoundError:
-        error_logger.error(f"{command} tidak ditemukan. Pastikan {command} sudah terinstal.")
-    except Exception as e:
-        error_logger.error(f"Terjadi kesalahan: {e}")
-        error_message = config["notifications"].get("error_message", "⏳🌾 Error terjadi pada bot {bot_name}: {error_message} ⚠️")
-        error_message = error_message.format(bot_name=config["bot_name"], error_message=str(e))
-        send_telegram_notification(error_message)
+        return []
+    except (OSError, ValueError) as e:
+        error_logger.error(f"State {path} tidak bisa dibaca, semua bot dijalankan baru: {e}")
+        return []
+    with file_digests_lock:
+        for file_path, value in state.get("file_digests", {}).items():
+            file_digests[file_path] = tuple(value)
+    reattached = []
+    for bot in bots.values():
+        entry = state.get("bots", {}).get(bot.name, {})
+        bot.restart_count = entry.get("restart_count", 0)
+        bot.crash_count = entry.get("crash_count", 0)
+        if entry.get("process") and reattach_bot(bot, entry["process"]):
+            reattached.append(bot)
+    for bot in reattached:
+        for file_path in watch_rules.files:
+            if bot in watch_rules.match(file_path) and file_content_changed(file_path):
+                console_logger.info(f"[{bot.name}] {file_path} berubah saat supervisor tidak berjalan.")
+                restart_bot_with_debounce(bot, file_path)
+    return reattached
+
+def reattach_bot(bot, info):
+    """Mengambil alih proses bot lama jika PID, start time dan cmdline-nya masih cocok."""
+    pid = info["pid"]
+    identity = read_process_identity(pid)
+    if identity is None or identity[0] != info["start_time"] or identity[1] != info["cmdline"]:
+        console_logger.info(f"[{bot.name}] Proses lama (pid {pid}) sudah tidak berjalan, bot dijalankan baru.")
+        return False
+    process = AdoptedProcess(pid, info["start_time"], info["cmdline"])
+    if info.get("process_group"):
+        bot.group_processes.add(process)
+    if info["cmdline"] != build_bot_command(bot):
+        console_logger.info(f"[{bot.name}] Perintah bot berubah sejak proses lama dijalankan, proses lama dihentikan.")
+        stop_process(bot, process)
+        return False
+    for spool in info.get("spools", []):
+        if os.path.exists(spool["path"]):
+            console = sys.stderr if spool["stderr"] else None
+            OutputReader(bot, process, None, console, spool_path=spool["path"], offset=spool["offset"])
+    if bot.config.get("shard_group"):
+        try:
+            bot.shard_lines = read_data_lines(bot.config["shard_file"])
+        except OSError:
+            pass
+    adopt_process(bot, process)
+    with open('/proc/uptime', 'r') as f:
+        uptime = float(f.read().split()[0])
+    bot.started_at = time.monotonic() - max(0, uptime - info["start_time"] / os.sysconf('SC_CLK_TCK'))
+    # started_at yang dimundurkan hanya untuk uptime; deteksi macet dihitung sejak pengambilalihan
+    bot.last_output = max(bot.last_output or 0, time.monotonic())
+    set_bot_state(bot, "running")
+    console_logger.info(f"[{bot.name}] Mengambil alih proses bot yang masih berjalan (pid {pid}).")
+    return True
+
+def sample_bots():
+    """Mengambil satu sampel /proc untuk proses setiap bot yang sedang berjalan."""
+    for bot in list(bots.values()):
+        process = bot.process
+        if not process or process.poll() is not None:
+            bot.stats = {}
+            continue
+        try:
+            bot.stats = read_process_stats(process.pid)
+        except (OSError, ValueError, IndexError):
+            bot.stats = {}  # Proses baru saja keluar atau /proc tidak tersedia
+        check_health(bot)
+
+def check_health(bot):
+    """Menerapkan kebijakan health bot: batas RSS dan deteksi bot yang macet."""
+    health = bot.config.get("health", {})
+    if not health or bot.state != "running" or bot.started_at is None:
+        return
+    now = time.monotonic()
+
+    max_rss_mb = health.get("max_rss_mb")
+    rss_bytes = bot.stats.get("rss_bytes")
+    if max_rss_mb and rss_bytes is not None:
+        if rss_bytes > max_rss_mb * 1024 * 1024:
+            bot.rss_over_count += 1
+        else:
+            bot.rss_over_count = 0
+        rss_samples = health.get("rss_samples", 3)
+        if bot.rss_over_count >= rss_samples:
+            planned_restart(bot, f"RSS {rss_bytes / 1024 / 1024:.0f} MB melebihi batas {max_rss_mb} MB selama {rss_samples} sampel")
+            return
+
+    idle_timeout = health.get("idle_timeout")
+    if not idle_timeout or now - bot.started_at < idle_timeout:
+        return
+    heartbeat_file = health.get("heartbeat_file")
+    if heartbeat_file:
+        try:
+            idle = time.time() - os.stat(heartbeat_file).st_mtime
+        except OSError:
+            idle = now - bot.started_at  # File heartbeat belum pernah dibuat
+        source = f"file heartbeat {heartbeat_file}"
+    else:
+        idle = now - max(bot.last_output or 0, bot.started_at)
+        source = "output"
+    if idle > idle_timeout:
+        planned_restart(bot, f"tidak ada {source} selama {idle:.0f} detik")
+
+def planned_restart(bot, reason):
+    """Memulai ulang bot karena kebijakan health lewat koordinator restart yang sama."""
+    bot.rss_over_count = 0
+    console_logger.warning(f"[{bot.name}] Restart terencana: {reason}")
+    health_message = bot.config["notifications"].get("health_restart_message", "⏳🌾 Bot {bot_name} dimulai ulang: {reason} 🩺")
+    send_telegram_notification(health_message.format(bot_name=bot.name, reason=reason), bot)
+    request_restart(bot)
+
+# Rentang nilai kolom cron: menit, jam, tanggal, bulan, hari (0 atau 7 = Minggu)
+cron_fields = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+@functools.lru_cache(maxsize=None)
+def parse_cron(expression):
+    """Mengurai ekspresi cron 5 kolom ("menit jam tanggal bulan hari").
+
+    Mendukung *, angka, rentang a-b, langkah */n atau a-b/n dan daftar dengan koma.
+    Mengembalikan (himpunan nilai per kolom, tanggal dibatasi, hari dibatasi).
+    """
+    parts = expression.split()
+    if len(parts) != 5:
+        raise ValueError(f"ekspresi cron harus 5 kolom: {expression!r}")
+    fields = []
+    for part, (low, high) in zip(parts, cron_fields):
+        values = set()
+        for item in part.split(','):
+            range_part, _, step = item.partition('/')
+            step = int(step) if step else 1
+            if range_part == '*':
+                start, end = low, high
+            elif '-' in range_part:
+                start, end = (int(value) for value in range_part.split('-', 1))
+            else:
+                start = int(range_part)
+                end = high if step > 1 or '/' in item else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"nilai {item!r} di luar rentang {low}-{high}")
+            values.update(range(start, end + 1, step))
+        fields.append(values)
+    if 7 in fields[4]:
+        fields[4] = (fields[4] - {7}) | {0}
+    return fields, parts[2] != '*', parts[4] != '*'
+
+def cron_matches(expression, moment):
+    """Mengecek apakah time.struct_time moment cocok dengan ekspresi cron."""
+    (minutes, hours, days, months, weekdays), day_restricted, weekday_restricted = parse_cron(expression)
+    if moment.tm_min not in minutes or moment.tm_hour not in hours or moment.tm_mon not in months:
+        return False
+    day_match = moment.tm_mday in days
+    weekday_match = (moment.tm_wday + 1) % 7 in weekdays  # tm_wday: Senin = 0, cron: Minggu = 0
+    if day_restricted and weekday_restricted:
+        return day_match or weekday_match  # Aturan cron: cukup salah satu jika keduanya diisi
+    return day_match and weekday_match
+
+def run_scheduler():
+    """Thread penjadwal restart berkala untuk bot yang memiliki schedule.
+
+    schedule berisi "interval" (detik) atau "cron", ditambah "jitter" (detik) opsional berupa
+    jeda acak agar bot dengan jadwal yang sama tidak dimulai ulang bersamaan.
+    """
+    while True:
+        now = time.monotonic()
+        minute = int(time.time() // 60)
+        moment = time.localtime()
+        for bot in list(bots.values()):
+            schedule = bot.config.get("schedule")
+            if bot.schedule_config is not schedule:
+                # Jadwal baru (atau konfigurasi di-reload): hitung ulang dari sekarang
+                bot.schedule_config = schedule
+                bot.schedule_due = None
+                bot.schedule_minute = minute  # Menit saat jadwal dimuat tidak langsung memicu restart
+            if not schedule or bot.retired:
+                continue
+            jitter = random.uniform(0, schedule.get("jitter", 0))
+            if bot.schedule_due is None:
+                if "cron" in schedule:
+                    if bot.schedule_minute != minute and cron_matches(schedule["cron"], moment):
+                        bot.schedule_minute = minute
+                        bot.schedule_due = now + jitter
+                else:
+                    bot.schedule_due = now + schedule["interval"] + jitter
+            if bot.schedule_due is not None and now >= bot.schedule_due:
+                bot.schedule_due = None
+                scheduled_restart(bot)
+        time.sleep(1)
+
+def scheduled_restart(bot):
+    """Memulai ulang bot sesuai jadwal lewat koordinator restart."""
+    if bot.manual_stop:
+        return
+    console_logger.info(f"[{bot.name}] Restart terjadwal.")
+    schedule_message = bot.config["notifications"].get("scheduled_restart_message", "⏳🌾 Bot {bot_name} dimulai ulang sesuai jadwal ⏰")
+    send_telegram_notification(schedule_message.format(bot_name=bot.name), bot)
+    request_restart(bot)
+
+def run_sampler():
+    """Thread pengambil sampel sumber daya bot dengan interval metrics_interval."""
+    while True:
+        sample_bots()
+        save_state()  # Offset spool dan counter ikut diperbarui secara berkala
+        time.sleep(config.get("metrics_interval", 15))
+
+def format_metrics():
+    """Menyusun semua metrik supervisor dalam format teks Prometheus."""
+    def label(name):
+        escaped = name.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return f'{{bot="{escaped}"}}'
+
+    per_bot = [
+        ("startbot_bot_up", "gauge", "1 jika proses bot sedang berjalan",
+         lambda bot: int(bool(bot.process and bot.process.poll() is None))),
+        ("startbot_process_cpu_seconds_total", "counter", "Waktu CPU proses bot (user + system)",
+         lambda bot: bot.stats.get("cpu_seconds")),
+        ("startbot_process_resident_memory_bytes", "gauge", "RSS proses bot",
+         lambda bot: bot.stats.get("rss_bytes")),
+        ("startbot_process_threads", "gauge", "Jumlah thread proses bot",
+         lambda bot: bot.stats.get("threads")),
+        ("startbot_process_open_fds", "gauge", "Jumlah file descriptor terbuka proses bot",
+         lambda bot: bot.stats.get("open_fds")),
+        ("startbot_restarts_total", "counter", "Jumlah restart bot",
+         lambda bot: bot.restart_count),
+        ("startbot_crashes_total", "counter", "Jumlah bot berhenti tiba-tiba",
+         lambda bot: bot.crash_count),
+        ("startbot_debounced_events_total", "counter", "Event file yang digabung oleh debounce",
+         lambda bot: bot.debounced_events),
+        ("startbot_restarts_collapsed_total", "counter", "Permintaan restart yang digabung saat restart berjalan",
+         lambda bot: bot.collapsed_restarts),
+        ("startbot_event_to_ready_seconds_sum", "counter", "Total waktu dari event file hingga bot siap",
+         lambda bot: bot.event_to_ready_sum),
+        ("startbot_event_to_ready_seconds_count", "counter", "Jumlah restart dari event file yang selesai",
+         lambda bot: bot.event_to_ready_count),
+    ]
+    lines = []
+    for name, metric_type, help_text, getter in per_bot:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for bot in list(bots.values()):
+            value = getter(bot)
+            if value is not None:
+                lines.append(f"{name}{label(bot.name)} {value}")
+    for name, metric_type, help_text, value in [
+        ("startbot_notifications_sent_total", "counter", "Notifikasi Telegram yang terkirim", notifier.sent_total),
+        ("startbot_notifications_failed_total", "counter", "Notifikasi Telegram yang gagal", notifier.failed_total),
+        ("startbot_notification_latency_seconds_sum", "counter", "Total waktu notifikasi dari antrean hingga terkirim", notifier.latency_sum),
+    ]:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+def create_http_server(address, handler):
+    """Membuat ThreadingHTTPServer untuk handler; http.server baru diimpor saat dibutuhkan.
+
+    Handler ditulis tanpa kelas dasar dan digabung dengan BaseHTTPRequestHandler di sini.
+    """
+    http_server = lazy_import("http.server")
+    handler_class = type(handler.__name__, (handler, http_server.BaseHTTPRequestHandler), {})
+    return http_server.ThreadingHTTPServer(address, handler_class)
+
+class MetricsHandler:
+    """Handler HTTP yang melayani GET /metrics (dipakai lewat create_http_server)."""
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = format_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Jangan memenuhi terminal dengan log setiap scrape
+
+def start_metrics():
+    """Menjalankan pengambil sampel dan endpoint /metrics jika metrics_port diatur."""
+    threading.Thread(target=run_sampler, name="metrics-sampler", daemon=True).start()
+    port = config.get("metrics_port")
+    if not port:
+        return
+    host = config.get("metrics_host", "127.0.0.1")
+    try:
+        server = create_http_server((host, port), MetricsHandler)
+    except OSError as e:
+        error_logger.error(f"Gagal membuka endpoint metrics di {host}:{port}: {e}")
+        return
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    console_logger.info(f"Endpoint metrics tersedia di http://{host}:{port}/metrics")
+
+class PollingWatcher:
+    """Backend pemantauan berbasis polling untuk filesystem tempat inotify tidak andal.
+
+    Menyimpan indeks (inode, ukuran, mtime_ns) untuk setiap file yang relevan dengan aturan
+    pemantauan. Isi direktori hanya dibaca ulang jika mtime direktori itu sendiri berubah,
+    sedangkan file yang sudah dikenal cukup di-stat. Interval scan mengecil setelah ada
+    perubahan dan membesar perlahan saat sepi. Event yang dihasilkan sama dengan event watchdog
+    sehingga ditangani FolderWatcher yang sama.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.watches = {}  # (path, rekursif) -> handler
+        # Indeks per direktori: path -> {"mtime": mtime_ns, "files": {path: tanda tangan}, "subdirs": set()}
+        self.index = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def schedule(self, handler, path, recursive=False):
+        watch = (path, recursive)
+        with self.lock:
+            self.watches[watch] = handler
+            self._scan_watch(path, recursive, handler, emit=False)
+        return watch
+
+    def unschedule(self, watch):
+        with self.lock:
+            self.watches.pop(watch, None)
+            # Buang indeks direktori yang tidak lagi tercakup watch lain
+            for directory in list(self.index):
+                if not any(is_within(directory, folder) if recursive else directory == folder
+                           for folder, recursive in self.watches):
+                    del self.index[directory]
+
+    def refresh(self):
+        """Membaca ulang semua direktori setelah aturan pemantauan berubah.
+
+        File yang baru cocok dengan aturan dicatat tanpa event; file yang sudah dikenal tetap
+        dicek seperti scan biasa.
+        """
+        with self.lock:
+            for (path, recursive), handler in list(self.watches.items()):
+                self._scan_watch(path, recursive, handler, emit=True, relist=True)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="polling-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            with self.lock:
+                changed = False
+                for (path, recursive), handler in list(self.watches.items()):
+                    changed = self._scan_watch(path, recursive, handler, emit=True) or changed
+            # Scan cepat setelah ada perubahan, melambat bertahap saat tidak ada aktivitas
+            self.interval = self.min_interval if changed else min(self.interval * 1.5, self.max_interval)
+
+    def _scan_watch(self, root, recursive, handler, emit, relist=False):
+        """Memindai satu watch; mengembalikan True jika ada event yang dihasilkan.
+
+        Dengan relist=True setiap direktori dibaca ulang walaupun mtime-nya tetap, tanpa event
+        "created" untuk file yang baru masuk indeks.
+        """
+        changed = False
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            entry = self.index.setdefault(directory, {"mtime": None, "files": {}, "subdirs": set()})
+            try:
+                directory_mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                directory_mtime = None
+            if relist or directory_mtime != entry["mtime"]:
+                # Isi direktori berubah (atau baru dikenal): baca ulang daftar entrinya
+                entry["mtime"] = directory_mtime
+                changed = self._list_directory(directory, entry, handler, emit and not relist) or changed
+            changed = self._stat_files(entry, handler, emit) or changed
+            if recursive:
+                pending.extend(entry["subdirs"])
+        return changed
+
+    def _list_directory(self, directory, entry, handler, emit):
+        changed = False
+        try:
+            with os.scandir(directory) as scanned:
+                dir_entries = list(scanned)
+        except OSError:
+            dir_entries = []
+        files = entry["files"]
+        present = set()
+        subdirs = set()
+        for dir_entry in dir_entries:
+            path = dir_entry.path
+            try:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    if not watch_rules.skip_directory(path):
+                        subdirs.add(path)
+                    continue
+                # Hanya file yang relevan dengan aturan pemantauan yang di-stat setiap scan
+                if path != config_path and not watch_rules.match(path):
+                    continue
+                present.add(path)
+                if path in files:
+                    continue
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+            files[path] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if emit:
+                handler.dispatch(FileEvent("created", path))
+                changed = True
+        for path in [path for path in files if path not in present]:
+            del files[path]
+            if emit:
+                handler.dispatch(FileEvent("deleted", path))
+                changed = True
+        for removed in entry["subdirs"] - subdirs:
+            for indexed in [indexed for indexed in self.index if is_within(indexed, removed)]:
+                del self.index[indexed]
+        entry["subdirs"] = subdirs
+        return changed
+
+    def _stat_files(self, entry, handler, emit):
+        """Mengecek file yang sudah dikenal; perubahan isi file tidak mengubah mtime direktori."""
+        changed = False
+        files = entry["files"]
+        for path, signature in list(files.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Penghapusan ditangani saat direktori dibaca ulang
+            current = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                files[path] = current
+                if emit:
+                    # Inode baru berarti file diganti (misalnya disimpan lewat rename)
+                    handler.dispatch(FileEvent("created" if current[0] != signature[0] else "modified", path))
+                    changed = True
+        return changed
+
+def bot_status(bot):
+    """Ringkasan status satu bot untuk perintah status."""
+    process = bot.process
+    running = bool(process and process.poll() is None)
+    spare = bot.spare
+    return {
+        "bot": bot.name,
+        "state": bot.state,
+        "running": running,
+        "pid": process.pid if running else None,
+        "uptime": round(time.monotonic() - bot.started_at, 1) if running and bot.started_at else None,
+        "restart_count": bot.restart_count,
+        "crash_count": bot.crash_count,
+        "last_exit_code": bot.last_exit_code,
+        "manual_stop": bot.manual_stop,
+        "spare_pid": spare[0].pid if spare else None,
+        "resources": read_resource_usage(bot, process) if running else None,
+    }
+
+def control_stop(bot):
+    """Menghentikan bot dan menahan restart otomatis sampai ada perintah start atau restart."""
+    with bot.state_lock:
+        bot.manual_stop = True
+        bot.pending_restart = False
+        for timer in (bot.restart_timer, bot.crash_timer):
+            if timer:
+                timer.cancel()
+        bot.restart_timer = None
+        bot.debounce_deadline = None
+        bot.debounce_paths = set()
+    with bot.lock:
+        stop_bot(bot)
+    discard_spare(bot)
+    set_bot_state(bot, "stopped")
+
+def control_start(bot):
+    """Menjalankan bot yang sedang berhenti; mengembalikan pesan hasil."""
+    with bot.state_lock:
+        bot.manual_stop = False
+        if bot.state in ("draining", "starting"):
+            return "Restart sedang berjalan."
+        if bot.process and bot.process.poll() is None:
+            return "Bot sudah berjalan."
+        bot.state = "starting"
+    threading.Thread(target=run_restarts, args=(bot, True), name=f"start-{bot.name}", daemon=True).start()
+    return "Bot dijalankan."
+
+def control_restart(bot):
+    """Restart segera tanpa menunggu debounce."""
+    with bot.state_lock:
+        bot.manual_stop = False
+        if bot.restart_timer:
+            bot.restart_timer.cancel()
+        bot.restart_timer = None
+        bot.debounce_deadline = None
+        bot.debounce_paths = set()
+    request_restart(bot)
+
+def control_send_input(bot, text):
+    """Menulis satu baris input ke stdin bot yang sedang berjalan."""
+    process = bot.process
+    if not process or process.poll() is not None:
+        raise ValueError("Bot tidak sedang berjalan.")
+    if not bot.config.get("keep_stdin_open", False) or process.stdin is None:
+        raise ValueError("stdin bot sudah ditutup. Aktifkan keep_stdin_open untuk memakai send-input.")
+    with bot.stdin_lock:
+        try:
+            process.stdin.write(text + "\n")
+            process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Gagal menulis ke stdin bot: {e}")
+
+control_commands = ("status", "restart", "stop", "start", "send-input")
+
+def handle_control_command(request):
+    """Menjalankan satu perintah kontrol dan mengembalikan respons dalam bentuk dict.
+
+    request berisi "command", "bot" (boleh kosong jika hanya ada satu bot, atau untuk status
+    semua bot) dan "text" untuk send-input.
+    """
+    command = request.get("command")
+    if command not in control_commands:
+        return {"ok": False, "error": f"Perintah tidak dikenal: {command}. Pilihan: {', '.join(control_commands)}"}
+    name = request.get("bot")
+    if not name:
+        if command == "status":
+            return {"ok": True, "bots": [bot_status(bot) for bot in list(bots.values())]}
+        if len(bots) != 1:
+            return {"ok": False, "error": "Nama bot wajib diisi jika ada lebih dari satu bot."}
+        name = next(iter(bots))
+    bot = bots.get(name)
+    if bot is None:
+        # Nama grup shard berlaku untuk semua worker di dalamnya
+        members = [member for member in list(bots.values()) if member.config.get("shard_group") == name]
+        if not members:
+            return {"ok": False, "error": f"Bot {name} tidak ditemukan."}
+        if command == "send-input":
+            return {"ok": False, "error": f"send-input harus ditujukan ke satu worker, misalnya {name}#1."}
+        # Worker dalam satu grup diproses bersamaan, misalnya agar stop tidak berurutan
+        responses = run_parallel(lambda member: handle_control_command({**request, "bot": member.name}), members, "control")
+        if command == "status":
+            return {"ok": True, "bots": [status for response in responses for status in response["bots"]]}
+        return {"ok": all(response["ok"] for response in responses), "message": f"{len(members)} worker: {responses[0].get('message') or responses[0].get('error')}"}
+
+    console_logger.info(f"[{bot.name}] Perintah kontrol diterima: {command}")
+    try:
+        if command == "status":
+            return {"ok": True, "bots": [bot_status(bot)]}
+        if command == "restart":
+            control_restart(bot)
+            return {"ok": True, "message": "Restart dijadwalkan."}
+        if command == "stop":
+            control_stop(bot)
+            return {"ok": True, "message": "Bot dihentikan."}
+        if command == "start":
+            return {"ok": True, "message": control_start(bot)}
+        control_send_input(bot, request.get("text", ""))
+        return {"ok": True, "message": "Input dikirim."}
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+
+class ControlSocketHandler(socketserver.StreamRequestHandler):
+    """Melayani perintah kontrol lewat Unix socket: satu baris JSON per permintaan."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = handle_control_command(request if isinstance(request, dict) else {})
+            except ValueError as e:
+                response = {"ok": False, "error": f"Permintaan bukan JSON yang valid: {e}"}
+            self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+class ControlHTTPHandler:
+    """API kontrol lewat HTTP: GET /status[/<bot>] dan POST /bots/<bot>/<perintah> (lewat create_http_server)."""
+
+    def _path_parts(self):
+        """Bagian path URL yang sudah di-unquote (nama bot bisa berisi spasi atau #)."""
+        import urllib.parse
+        return [urllib.parse.unquote(part) for part in self.path.split('?', 1)[0].split('/') if part]
+
+    def do_GET(self):
+        parts = self._path_parts()
+        if parts[:1] != ["status"] or len(parts) > 2:
+            self.send_error(404)
+            return
+        self._respond(handle_control_command({"command": "status", "bot": parts[1] if len(parts) == 2 else None}))
+
+    def do_POST(self):
+        parts = self._path_parts()
+        if len(parts) != 3 or parts[0] != "bots":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        text = self.rfile.read(length).decode('utf-8') if length else ""
+        self._respond(handle_control_command({"command": parts[2], "bot": parts[1], "text": text}))
+
+    def _respond(self, response):
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200 if response.get("ok") else 400)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_control():
+    """Membuka Unix socket kontrol (control_socket) dan HTTP kontrol (control_http_port) jika diatur."""
+    socket_path = config.get("control_socket")
+    if socket_path and hasattr(socket, "AF_UNIX"):
+        socket_path = resolve_path(socket_path)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # Socket sisa supervisor sebelumnya
+        try:
+            server = socketserver.ThreadingUnixStreamServer(socket_path, ControlSocketHandler)
+            os.chmod(socket_path, 0o600)  # Hanya pemilik yang boleh mengirim perintah
+        except OSError as e:
+            error_logger.error(f"Gagal membuka socket kontrol {socket_path}: {e}")
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="control-socket", daemon=True).start()
+            console_logger.info(f"Socket kontrol tersedia di {socket_path}")
+    port = config.get("control_http_port")
+    if port:
+        try:
+            server = create_http_server(("127.0.0.1", port), ControlHTTPHandler)
+        except OSError as e:
+            error_logger.error(f"Gagal membuka HTTP kontrol di 127.0.0.1:{port}: {e}")
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="control-http", daemon=True).start()
+            console_logger.info(f"HTTP kontrol tersedia di http://127.0.0.1:{port}")
+
+def send_control_command(request, socket_path=None, http_url=None):
+    """Mengirim satu perintah ke supervisor yang sedang berjalan (dipakai subcommand ctl)."""
+    if http_url:
+        import urllib.request
+        import urllib.error
+        import urllib.parse
+        bot_name = urllib.parse.quote(request.get("bot") or "", safe='')  # Nama worker shard berisi #
+        if request["command"] == "status":
+            url = f"{http_url.rstrip('/')}/status" + (f"/{bot_name}" if bot_name else "")
+            http_request = urllib.request.Request(url)
+        else:
+            url = f"{http_url.rstrip('/')}/bots/{bot_name}/{request['command']}"
+            http_request = urllib.request.Request(url, data=request.get("text", "").encode('utf-8'), method="POST")
+        try:
+            with urllib.request.urlopen(http_request, timeout=30) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return json.loads(e.read())
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(30)
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode('utf-8'))
+        with client.makefile('rb') as reader:
+            return json.loads(reader.readline())
+
+def run_ctl(args):
+    """Subcommand ctl: meneruskan perintah ke supervisor dan mencetak respons JSON."""
+    socket_path = args.socket
+    if not socket_path and not args.http:
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                socket_path = json.load(f).get("control_socket")
+        except (OSError, ValueError):
+            socket_path = None
+        if not socket_path:
+            print("control_socket belum diatur di settings.json. Gunakan --socket atau --http.", file=sys.stderr)
+            return 1
+        socket_path = resolve_path(socket_path)
+    import http.client
+    request = {"command": args.command, "bot": args.bot, "text": " ".join(args.text)}
+    try:
+        response = send_control_command(request, socket_path=socket_path, http_url=args.http)
+    except (OSError, ValueError, http.client.HTTPException) as e:
+        print(f"Gagal menghubungi supervisor: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(response, indent=2, ensure_ascii=False))
+    return 0 if response.get("ok") else 1
+
+def format_bot_summary(bot):
+    """Ringkasan satu baris status dan sumber daya bot untuk balasan Telegram."""
+    status = bot_status(bot)
+    text = f"{bot.name}: {status['state']}"
+    if status["running"]:
+        text += f", pid {status['pid']}, uptime {status['uptime']:.0f} detik"
+    text += f", restart {status['restart_count']}, crash {status['crash_count']}, exit terakhir {status['last_exit_code']}"
+    return text
+
+def format_bot_metrics(bot):
+    """Ringkasan metrik sumber daya dan penghitung bot untuk perintah /metrics."""
+    stats = bot.stats
+    lines = [f"{bot.name}:"]
+    if stats:
+        lines.append(f"  RSS {stats.get('rss_bytes', 0) / 1024 / 1024:.1f} MB, CPU {stats.get('cpu_seconds', 0):.1f} detik")
+        lines.append(f"  thread {stats.get('threads')}, fd {stats.get('open_fds')}")
+    lines.append(f"  restart {bot.restart_count}, crash {bot.crash_count}, debounce {bot.debounced_events}, digabung {bot.collapsed_restarts}")
+    if bot.event_to_ready_count:
+        lines.append(f"  event ke siap rata-rata {bot.event_to_ready_sum / bot.event_to_ready_count:.2f} detik")
+    return "\n".join(lines)
+
+def output_tail_text(bot, count, limit=3500):
+    """Baris output terakhir bot, dipotong dari depan agar setelah di-escape tetap di bawah limit.
+
+    limit menyisakan ruang untuk teks lain di bawah batas 4096 karakter pesan Telegram.
+    """
+    tail = "\n".join(list(bot.output_tail)[-count:])[-limit:]
+    escaped_length = len(html.escape(tail))
+    while escaped_length > limit:
+        # Karakter seperti & dan < menjadi hingga 6 karakter setelah di-escape
+        tail = tail[max(1, (escaped_length - limit) // 6):]
+        escaped_length = len(html.escape(tail))
+    return tail
+
+def pre(text):
+    """Membungkus teks dalam <pre> yang aman untuk parse_mode HTML."""
+    return f"<pre>{html.escape(text)}</pre>"
+
+def pre_blocks(entries, limit=3500):
+    """Membungkus entri (satu per bot) dalam beberapa <pre> yang masing-masing di bawah limit.
+
+    Setiap blok dikirim sebagai pesan sendiri sehingga pesan panjang tidak pernah dipotong di
+    dalam tag <pre> (Telegram menolak HTML yang terpotong).
+    """
+    blocks, current, size = [], [], 0
+    for entry in entries:
+        length = len(html.escape(entry)) + 1
+        if current and size + length > limit:
+            blocks.append(pre("\n".join(current)))
+            current, size = [], 0
+        current.append(entry)
+        size += length
+    if current:
+        blocks.append(pre("\n".join(current)))
+    return blocks
+
+def handle_telegram_command(text):
+    """Menjalankan satu perintah chat (/status, /restart, /stop, /start, /logs, /metrics).
+
+    Mengembalikan daftar pesan balasan; balasan /status dan /metrics dipecah per kelompok bot.
+    """
+    parts = text.split()
+    command = parts[0].split('@', 1)[0].lower()  # "/status@NamaBot" dari grup
+    args = parts[1:]
+    name = args[0] if args else None
+    if command in ("/restart", "/stop", "/start", "/status"):
+        response = handle_control_command({"command": command[1:], "bot": name})
+        if not response["ok"]:
+            return [f"⚠️ {html.escape(response['error'])}"]
+        if command == "/status":
+            return pre_blocks([format_bot_summary(bots[status["bot"]]) for status in response["bots"] if status["bot"] in bots])
+        return [f"✅ {html.escape(response['message'])}"]
+    if command == "/logs":
+        if not name and len(bots) == 1:
+            name = next(iter(bots))
+        bot = bots.get(name)
+        if bot is None:
+            return ["⚠️ Gunakan /logs &lt;nama bot&gt; [jumlah baris]."]
+        count = int(args[1]) if len(args) > 1 and args[1].isdigit() else 20
+        tail = output_tail_text(bot, count)
+        return [pre(tail or "(belum ada output)")]
+    if command == "/metrics":
+        selected = [bots[name]] if name in bots else list(bots.values())
+        return pre_blocks([format_bot_metrics(bot) for bot in selected])
+    return ["Perintah: /status, /restart &lt;bot&gt;, /stop &lt;bot&gt;, /start &lt;bot&gt;, /logs &lt;bot&gt; [n], /metrics [bot]"]
+
+def run_telegram_commands():
+    """Long-polling getUpdates untuk menerima perintah dari chat Telegram yang dikonfigurasi.
+
+    Hanya pesan dari telegram_chat_id yang diproses. Update yang sudah ada sebelum supervisor
+    berjalan dilewati agar perintah lama (misalnya /restart kemarin) tidak dijalankan ulang.
+    """
+    session = None
+    offset = None
+    while True:
+        if not config.get("telegram_commands"):
+            time.sleep(5)
+            continue
+        bot_token = config.get("telegram_bot_token")
+        chat_id = str(config.get("telegram_chat_id"))
+        api_url = config.get("telegram_api_url", "https://api.telegram.org")
+        poll_timeout = config.get("telegram_poll_timeout", 30)
+        requests = lazy_import("requests")
+        if session is None:
+            session = requests.Session()
+        url = f"{api_url.rstrip('/')}/bot{bot_token}/getUpdates"
+        params = {"timeout": 0 if offset is None else poll_timeout, "allowed_updates": json.dumps(["message"])}
+        params["offset"] = -1 if offset is None else offset
+        try:
+            response = session.get(url, params=params, timeout=poll_timeout + 10)
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            error_logger.error(f"Gagal mengambil perintah dari Telegram: {e}")
+            time.sleep(5)
+            continue
+        if not data.get("ok"):
+            error_logger.error(f"Telegram menolak getUpdates: {data.get('description')}")
+            time.sleep(data.get("parameters", {}).get("retry_after", 5))
+            continue
+        skip_backlog = offset is None
+        for update in data.get("result", []):
+            offset = update["update_id"] + 1
+            message = update.get("message") or {}
+            text = message.get("text", "")
+            if skip_backlog or not text.startswith("/"):
+                continue
+            if str(message.get("chat", {}).get("id")) != chat_id:
+                console_logger.warning(f"Perintah Telegram dari chat {message.get('chat', {}).get('id')} diabaikan.")
+                continue
+            console_logger.info(f"Perintah Telegram diterima: {text}")
+            for reply in handle_telegram_command(text):
+                send_telegram_notification(reply)
+        if skip_backlog and offset is None:
+            offset = 0  # Belum ada update sama sekali
+
+def update_watches():
+    """Menyesuaikan direktori yang dijadwalkan di Observer dengan daftar file saat ini."""
+    prime_file_digests()
+    # Setiap direktori cukup dijadwalkan sekali walaupun diawasi oleh banyak bot
+    watches = watch_rules.directories()
+    config_directory = os.path.dirname(config_path)
+    if not any(is_within(config_directory, folder) for folder, recursive in watches if recursive):
+        watches.add((config_directory, False))
+    for watch in list(observed_watches):
+        if watch not in watches:
+            observer.unschedule(observed_watches.pop(watch))
+    for directory, recursive in sorted(watches - observed_watches.keys()):
+        try:
+            observed_watches[(directory, recursive)] = observer.schedule(event_handler, path=directory, recursive=recursive)
+        except OSError as e:
+            error_logger.error(f"Gagal memantau direktori {directory}: {e}")
+    if isinstance(observer, PollingWatcher):
+        # Direktori yang sudah diawasi hanya dibaca ulang jika mtime-nya berubah, padahal file
+        # di dalamnya mungkin baru masuk aturan pemantauan
+        observer.refresh()
 
 def start_monitoring():
-    """Mulai memantau file tertentu dalam daftar files_to_watch."""
+    """Mulai memantau file dari semua bot dan settings.json dengan satu Observer bersama."""
+    global observer, event_handler
+    started = time.perf_counter()
     event_handler = FolderWatcher()
-    observer = Observer()
-    # Memantau direktori dari setiap file dalam files_to_watch
-    for file_to_watch in config["files_to_watch"]:
-        directory_to_watch = os.path.dirname(file_to_watch)  # Dapatkan direktori dari path file
-        observer.schedule(event_handler, path=directory_to_watch, recursive=False)
+    if config.get("watcher_backend", "inotify") == "polling":
+        observer = PollingWatcher(config.get("polling_interval_min", 0.5), config.get("polling_interval_max", 5))
+    else:
+        observer = lazy_import("watchdog.observers").Observer()
+    update_watches()
     observer.start()
+    start_metrics()
+    start_control()
+    threading.Thread(target=run_telegram_commands, name="telegram-commands", daemon=True).start()
+    threading.Thread(target=run_scheduler, name="scheduler", daemon=True).start()
+    mark_startup("memulai watcher dan kontrol", started)
+    if startup_profile:
+        report_startup_profile()
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
         observer.stop()
     observer.join()
+    if config.get("reattach", False):
+        # Bot dibiarkan berjalan agar diambil alih supervisor berikutnya; cadangan tidak dibutuhkan lagi
+        run_parallel(discard_spare, list(bots.values()), "shutdown")
+        save_state()
+        for bot in bots.values():
+            close_output_logger(bot)
+        console_logger.info("Supervisor berhenti, bot tetap berjalan untuk diambil alih.")
+    else:
+        # Bot berjalan di process group sendiri sehingga tidak ikut menerima Ctrl+C; hentikan bersamaan
+        console_logger.info("Menghentikan semua bot...")
+        run_parallel(retire_bot, list(bots.values()), "shutdown")
+    notifier.stop()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Supervisor untuk menjalankan dan memantau bot.")
+    parser.add_argument("--startup-profile", action="store_true", help="Cetak rincian waktu import dan inisialisasi supervisor")
+    subparsers = parser.add_subparsers(dest="subcommand")
+    ctl = subparsers.add_parser("ctl", help="Mengirim perintah ke supervisor yang sedang berjalan")
+    ctl.add_argument("command", choices=control_commands)
+    ctl.add_argument("bot", nargs="?", help="Nama bot (boleh kosong jika hanya ada satu bot)")
+    ctl.add_argument("text", nargs="*", help="Teks untuk send-input")
+    ctl.add_argument("--socket", help="Path Unix socket kontrol (default: control_socket di settings.json)")
+    ctl.add_argument("--http", help="URL HTTP kontrol, misalnya http://127.0.0.1:8766")
+    return parser.parse_args(argv)
 
 if __name__ == '__main__':
+    args = parse_args()
+    if args.subcommand == "ctl":
+        sys.exit(run_ctl(args))
+
+    startup_profile = args.startup_profile
+
     # Memuat konfigurasi
+    started = time.perf_counter()
     load_config()
+    mark_startup("memuat konfigurasi" + (" (dari cache)" if config_from_cache else ""), started)
 
-    # Menjalankan skrip bot pertama kali saat skrip dimulai
-    start_bot()
+    # Menjalankan semua bot pertama kali saat skrip dimulai
+    started = time.perf_counter()
+    start_all_bots()
+    mark_startup("menjalankan bot hingga siap", started)
     start_monitoring()